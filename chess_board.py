@@ -2,6 +2,44 @@ import pygame
 import math
 from constants import *
 from chess_piece import ChessPiece
+from sprites import piece_sprite, faded_piece_sprite, board_size_for
+from fonts import get_font, render_text
+from chess_rules.position import (Position, TYPE_INDEX, TYPE_NAMES, COLOR_INDEX, EMPTY, NO_SQUARE, ALL_CASTLING,
+                                  WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+                                  KING, WHITE_INDEX, COLOR_NAMES, iter_bits, lsb, on_board, square_index,
+                                  square_position)
+from chess_rules.attack_tables import SQUARE_POSITIONS
+from chess_rules.movegen import generate_legal_moves, is_in_check, is_square_attacked, attackers_to
+from chess_engine.see import hanging_pieces
+from chess_engine.bitbase import probe as probe_bitbase, WIN, DRAW
+
+
+class BoardStatus:
+    """Check and game-end state of one position, worked out once per move.
+
+    in_check is indexed by color index, checkers is the bitboard of pieces
+    giving check to the side to move. Hanging pieces are filled in per color
+    the first time they are asked for.
+    """
+
+    __slots__ = ('key', 'in_check', 'checkers', 'legal_moves', 'checkmate', 'stalemate', 'verdict',
+                 'hanging')
+
+    def __init__(self, pos):
+        self.key = pos.hash
+        self.in_check = (is_in_check(pos, 0), is_in_check(pos, 1))
+        king = pos.pieces[pos.side][KING]
+        self.checkers = attackers_to(pos, lsb(king), pos.side ^ 1) if king else 0
+        self.legal_moves = generate_legal_moves(pos)
+        self.checkmate = bool(self.checkers) and not self.legal_moves
+        self.stalemate = not self.checkers and not self.legal_moves
+        self.verdict = probe_bitbase(pos)
+        self.hanging = {}
+
+    @property
+    def check(self):
+        # Either king is attacked
+        return self.in_check[0] or self.in_check[1]
 
 
 class ChessBoard:
@@ -13,16 +51,16 @@ class ChessBoard:
         self.captured_white = []
         self.captured_black = []
 
+        # Bitboards mirror the piece lists for fast occupancy tests
+        self.pos = Position()
+        self.piece_squares = [None] * 64  # ChessPiece on each square
+        self._undo_stack = []  # piece-level undo records, parallel to pos.history
+        self._status = None  # BoardStatus of the last position asked about
+
         # Load fonts
-        try:
-            self.font = pygame.font.Font('freesansbold.ttf', 20)
-            self.medium_font = pygame.font.Font('freesansbold.ttf', 40)
-            self.big_font = pygame.font.Font('freesansbold.ttf', 50)
-        except FileNotFoundError:
-            print("Warning: Font not found, using system font.")
-            self.font = pygame.font.SysFont('Arial', 20)
-            self.medium_font = pygame.font.SysFont('Arial', 40)
-            self.big_font = pygame.font.SysFont('Arial', 50)
+        self.font = get_font(20)
+        self.medium_font = get_font(40)
+        self.big_font = get_font(50)
 
         self.selected_piece = None
         self.white_ep = (100, 100)  # En passant square
@@ -33,6 +71,7 @@ class ChessBoard:
         self.square_size = 90  # Size of each square
         self.start_pos = 20  # Space from edge
         self.board_size = self.square_size * 8 + self.start_pos * 2
+        self._board_layers = {}  # flipped -> pre-rendered board surface
 
         # For promotion options
         self.highlight_promotion_option = -1
@@ -43,81 +82,148 @@ class ChessBoard:
         self.black_pieces = []
         self.captured_white = []
         self.captured_black = []
+        self.pos.clear()
+        self.piece_squares = [None] * 64
+        self._undo_stack = []
+        self.white_ep = (100, 100)
+        self.black_ep = (100, 100)
 
         # Standard piece order: R N B Q K B N R
         standard_piece_types = ['rook', 'knight', 'bishop', 'queen', 'king', 'bishop', 'knight', 'rook']
 
         # Add white pieces
         for i, piece_type in enumerate(standard_piece_types):
-            self.white_pieces.append(ChessPiece(piece_type, WHITE, (i, 0), self))
+            self.add_piece(ChessPiece(piece_type, WHITE, (i, 0), self))
 
         # Add white pawns
         for i in range(8):
-            self.white_pieces.append(ChessPiece('pawn', WHITE, (i, 1), self))
+            self.add_piece(ChessPiece('pawn', WHITE, (i, 1), self))
 
         # Add black pieces
         for i, piece_type in enumerate(standard_piece_types):
-            self.black_pieces.append(ChessPiece(piece_type, BLACK, (i, 7), self))
+            self.add_piece(ChessPiece(piece_type, BLACK, (i, 7), self))
 
         # Add black pawns
         for i in range(8):
-            self.black_pieces.append(ChessPiece('pawn', BLACK, (i, 6), self))
+            self.add_piece(ChessPiece('pawn', BLACK, (i, 6), self))
+
+        self.pos.set_state(WHITE_INDEX, ALL_CASTLING)
+
+    def load_position(self, pos):
+        # Build piece sprites for a chess_rules Position (e.g. from a FEN)
+        self.white_pieces = []
+        self.black_pieces = []
+        self.captured_white = []
+        self.captured_black = []
+        self.pos = pos.copy()
+        self.piece_squares = [None] * 64
+        self._undo_stack = []
+        self.white_ep = (100, 100)
+        self.black_ep = (100, 100)
+
+        for square, code in enumerate(pos.squares):
+            if code == EMPTY:
+                continue
+            color = WHITE if code < 6 else BLACK
+            piece = ChessPiece(TYPE_NAMES[code % 6], color, SQUARE_POSITIONS[square], self)
+            piece.on_board = True
+            piece.has_moved = self._moved_from_start(piece, pos.castling)
+            self.piece_squares[square] = piece
+            pieces = self.white_pieces if color == WHITE else self.black_pieces
+            piece.list_index = len(pieces)
+            pieces.append(piece)
+
+        if pos.ep_square != NO_SQUARE:
+            if pos.side == WHITE_INDEX:
+                self.black_ep = SQUARE_POSITIONS[pos.ep_square]
+            else:
+                self.white_ep = SQUARE_POSITIONS[pos.ep_square]
+
+    def snapshot(self):
+        # Current position as a few dozen bytes, for replay and analysis
+        return self.pos.to_bytes()
+
+    def restore_snapshot(self, data):
+        self.load_position(Position.from_bytes(data))
+
+    @staticmethod
+    def _moved_from_start(piece, castling):
+        # Best guess for has_moved when a game starts from a position
+        x, y = piece.position
+        home_rank = 0 if piece.color == WHITE else 7
+        if piece.piece_type == 'pawn':
+            return y != (1 if piece.color == WHITE else 6)
+        if piece.piece_type not in ('king', 'rook') or y != home_rank:
+            return True
+        kingside, queenside = (WHITE_KINGSIDE, WHITE_QUEENSIDE) if piece.color == WHITE else \
+            (BLACK_KINGSIDE, BLACK_QUEENSIDE)
+        if piece.piece_type == 'king':
+            return x != 4 or not castling & (kingside | queenside)
+        if x == 7:
+            return not castling & kingside
+        return x != 0 or not castling & queenside
 
     def set_playing_side(self, as_white):
         self.playing_as_white = as_white
         self.setup_board()
 
-    def draw_board(self, flipped=False):
+    def square_rect(self, position, flipped=False):
+        # Screen rect of the square at board coordinates position
+        x, y = position
+        screen_y = 7 - y if flipped else y
+        return pygame.Rect(self.start_pos + x * self.square_size, self.start_pos + screen_y * self.square_size,
+                           self.square_size, self.square_size)
+
+    def invalidate_board_layer(self):
+        # Rebuild the board layers on next draw, e.g. after a resize or new board colors
+        self._board_layers.clear()
+
+    def _build_board_layer(self, flipped):
+        # Wooden border, squares and coordinate labels for one orientation
+        layer = pygame.Surface((self.board_size, self.board_size))
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+
         # Draw wooden border
-        pygame.draw.rect(self.screen, WOOD_BROWN, [0, 0, self.board_size, self.board_size])
+        pygame.draw.rect(layer, WOOD_BROWN, [0, 0, self.board_size, self.board_size])
 
         # Draw squares
         for row in range(8):
             for col in range(8):
-                screen_y = 7 - row if flipped else row
-
-                # Calculate position
-                rect = [self.start_pos + col * self.square_size,
-                        self.start_pos + screen_y * self.square_size,
-                        self.square_size,
-                        self.square_size]
+                rect = self.square_rect((col, row), flipped)
 
                 if (row + col) % 2 == 0:
                     # Blue squares
-                    color = LIGHT_BLUE
-                    pygame.draw.rect(self.screen, color, rect)
+                    pygame.draw.rect(layer, LIGHT_BLUE, rect)
                     # Add highlight
-                    pygame.draw.line(self.screen, LIGHT_BLUE_HIGHLIGHT,
-                                     (rect[0], rect[1]), (rect[0] + rect[2], rect[1]), 2)
+                    pygame.draw.line(layer, LIGHT_BLUE_HIGHLIGHT, rect.topleft, rect.topright, 2)
                 else:
-                    pygame.draw.rect(self.screen, CREAM_WHITE, rect)
+                    pygame.draw.rect(layer, CREAM_WHITE, rect)
 
         # Draw labels (A-H, 1-8)
-        try:
-            label_font = pygame.font.Font('freesansbold.ttf', 16)
-        except:
-            label_font = pygame.font.SysFont('Arial', 16)
+        label_font = get_font(16)
 
         for i in range(8):
-            # File labels (A-H)
-            file_label = chr(65 + i)  # A=65, B=66, etc.
+            # File labels (A-H), reversed when the board is flipped
+            file_label = label_font.render(chr(65 + (7 - i if flipped else i)), True, WOOD_DARK)
             x_pos = self.start_pos + i * self.square_size + self.square_size // 2 - 5
-
-            # Adjust if board is flipped
-            if not flipped:
-                self.screen.blit(label_font.render(file_label, True, WOOD_DARK), (x_pos, 5))
-                self.screen.blit(label_font.render(file_label, True, WOOD_DARK), (x_pos, self.board_size - 15))
-            else:
-                # Flip labels when board is flipped
-                rev_file = chr(65 + (7 - i))
-                self.screen.blit(label_font.render(rev_file, True, WOOD_DARK), (x_pos, 5))
-                self.screen.blit(label_font.render(rev_file, True, WOOD_DARK), (x_pos, self.board_size - 15))
+            layer.blit(file_label, (x_pos, 5))
+            layer.blit(file_label, (x_pos, self.board_size - 15))
 
             # Rank labels (1-8)
-            rank_label = str(8 - i) if not flipped else str(i + 1)
+            rank_label = label_font.render(str(i + 1) if flipped else str(8 - i), True, WOOD_DARK)
             y_pos = self.start_pos + i * self.square_size + self.square_size // 2 - 5
-            self.screen.blit(label_font.render(rank_label, True, WOOD_DARK), (5, y_pos))
-            self.screen.blit(label_font.render(rank_label, True, WOOD_DARK), (self.board_size - 15, y_pos))
+            layer.blit(rank_label, (5, y_pos))
+            layer.blit(rank_label, (self.board_size - 15, y_pos))
+        return layer
+
+    def draw_board(self, flipped=False):
+        # Border, squares and labels are drawn once per orientation and reused
+        layer = self._board_layers.get(flipped)
+        if layer is None:
+            layer = self._build_board_layer(flipped)
+            self._board_layers[flipped] = layer
+        self.screen.blit(layer, (0, 0))
 
         # Display board info
         try:
@@ -130,8 +236,8 @@ class ChessBoard:
 
             # Add text
             try:
-                self.screen.blit(self.font.render(f"Board: {flip_status}", True, CREAM_WHITE), (850, 50))
-                self.screen.blit(self.font.render(side_text, True, CREAM_WHITE), (850, 80))
+                self.screen.blit(render_text(self.font, f"Board: {flip_status}", CREAM_WHITE), (850, 50))
+                self.screen.blit(render_text(self.font, side_text, CREAM_WHITE), (850, 80))
             except Exception as e:
                 print(f"Text error: {e}")
         except Exception as e:
@@ -145,9 +251,7 @@ class ChessBoard:
         try:
             bg_pieces = ['king', 'queen', 'knight', 'rook']
             for i, piece_type in enumerate(bg_pieces):
-                piece_img = pygame.image.load(f"images/white {piece_type}.png")
-                piece_img = pygame.transform.scale(piece_img, (150, 150))
-                piece_img.set_alpha(50)  # Make see-through
+                piece_img = faded_piece_sprite(WHITE, piece_type, 150, 50)  # Make see-through
                 self.screen.blit(piece_img, (150 + i * 250, 600))
         except:
             # Skip if images don't load
@@ -155,11 +259,11 @@ class ChessBoard:
 
         # Add title with shadow
         title_text = "CHESS MASTER"
-        shadow_font = pygame.font.Font('freesansbold.ttf', 72)
-        title_font = pygame.font.Font('freesansbold.ttf', 70)
+        shadow_font = get_font(72)
+        title_font = get_font(70)
 
-        shadow = shadow_font.render(title_text, True, WOOD_DARK)
-        title = title_font.render(title_text, True, GOLD)
+        shadow = render_text(shadow_font, title_text, WOOD_DARK)
+        title = render_text(title_font, title_text, GOLD)
 
         title_rect = title.get_rect(center=(WIDTH // 2, 150))
         shadow_rect = shadow.get_rect(center=(WIDTH // 2 + 4, 150 + 4))
@@ -205,12 +309,12 @@ class ChessBoard:
         pygame.draw.rect(self.screen, GOLD if button_hover == "quit" else WOOD_DARK, quit_button, 3, border_radius=10)
 
         # Add text to buttons
-        white_text = self.medium_font.render("Play as White", True, 'black')
-        black_text = self.medium_font.render("Play as Black", True, 'white')
+        white_text = render_text(self.medium_font, "Play as White", 'black')
+        black_text = render_text(self.medium_font, "Play as Black", 'white')
 
         # Smaller text for quit button
-        quit_font = pygame.font.Font('freesansbold.ttf', 24)
-        quit_text = quit_font.render("Quit", True, 'white')
+        quit_font = get_font(24)
+        quit_text = render_text(quit_font, "Quit", 'white')
 
         white_text_rect = white_text.get_rect(center=white_button.center)
         black_text_rect = black_text.get_rect(center=black_button.center)
@@ -221,9 +325,9 @@ class ChessBoard:
         self.screen.blit(quit_text, quit_text_rect)
 
         # Add instructions at bottom
-        instruction_font = pygame.font.Font('freesansbold.ttf', 18)
+        instruction_font = get_font(18)
         instructions = "Press F to flip board | Press R to restart game"
-        inst_text = instruction_font.render(instructions, True, LIGHT_GRAY)
+        inst_text = render_text(instruction_font, instructions, LIGHT_GRAY)
         self.screen.blit(inst_text, (WIDTH // 2 - inst_text.get_width() // 2, HEIGHT - 50))
 
         return white_button, black_button, quit_button
@@ -249,22 +353,22 @@ class ChessBoard:
         pygame.draw.rect(self.screen, indicator_color, turn_rect, border_radius=10)
         pygame.draw.rect(self.screen, GOLD, turn_rect, 3, border_radius=10)
 
-        turn_font = pygame.font.Font('freesansbold.ttf', 32)
+        turn_font = get_font(32)
         text_color = BLACK if turn_step < 2 else WHITE
 
         # Center the text
-        turn_label = turn_font.render(turn_text, True, text_color)
+        turn_label = render_text(turn_font, turn_text, text_color)
         self.screen.blit(turn_label, (turn_rect.centerx - turn_label.get_width() // 2,
                                     turn_rect.centery - turn_label.get_height() // 2))
 
         # Display time for both sides
-        time_font = pygame.font.Font('freesansbold.ttf', 32)
+        time_font = get_font(32)
 
         # White time display
         white_minutes = int(white_time) // 60
         white_seconds = int(white_time) % 60
         white_time_text = f"{white_minutes:02d}:{white_seconds:02d}"
-        white_time_label = time_font.render(white_time_text, True, 'black')
+        white_time_label = render_text(time_font, white_time_text, 'black')
 
         white_time_rect = pygame.Rect(240, 820, 120, 60)
         pygame.draw.rect(self.screen, WHITE, white_time_rect, border_radius=10)
@@ -276,7 +380,7 @@ class ChessBoard:
         black_minutes = int(black_time) // 60
         black_seconds = int(black_time) % 60
         black_time_text = f"{black_minutes:02d}:{black_seconds:02d}"
-        black_time_label = time_font.render(black_time_text, True, 'white')
+        black_time_label = render_text(time_font, black_time_text, 'white')
 
         black_time_rect = pygame.Rect(380, 820, 120, 60)
         pygame.draw.rect(self.screen, BLACK, black_time_rect, border_radius=10)
@@ -289,7 +393,7 @@ class ChessBoard:
         pygame.draw.rect(self.screen, LIGHT_GRAY, forfeit_rect, border_radius=10)
         pygame.draw.rect(self.screen, DARK_RED, forfeit_rect, 3, border_radius=10)
 
-        forfeit_text = self.font.render("FORFEIT GAME", True, DARK_RED)
+        forfeit_text = render_text(self.font, "FORFEIT GAME", DARK_RED)
         self.screen.blit(forfeit_text, (forfeit_rect.centerx - forfeit_text.get_width() // 2,
                                         forfeit_rect.centery - forfeit_text.get_height() // 2))
 
@@ -297,8 +401,8 @@ class ChessBoard:
         controls_rect = pygame.Rect(810, 700, 380, 100)
         pygame.draw.rect(self.screen, LIGHT_GRAY, controls_rect, border_radius=10)
 
-        self.screen.blit(self.font.render('F - Flip Board', True, 'black'), (830, 710))
-        self.screen.blit(self.font.render('R - Return to Menu', True, 'black'), (830, 750))
+        self.screen.blit(render_text(self.font, 'F - Flip Board', 'black'), (830, 710))
+        self.screen.blit(render_text(self.font, 'R - Return to Menu', 'black'), (830, 750))
 
     def draw_pieces(self, turn_step, selection, flipped=False):
         # Draw white pieces
@@ -359,8 +463,8 @@ class ChessBoard:
         pygame.draw.rect(self.screen, LIGHT_GRAY, captured_rect, border_radius=10)
 
         # "Captured Pieces" title
-        title_font = pygame.font.Font('freesansbold.ttf', 24)
-        captured_title = title_font.render("Captured Pieces", True, 'black')
+        title_font = get_font(24)
+        captured_title = render_text(title_font, "Captured Pieces", 'black')
         self.screen.blit(captured_title, (captured_rect.centerx - captured_title.get_width() // 2, 160))
 
         # Tables for black and white pieces
@@ -376,8 +480,8 @@ class ChessBoard:
         pygame.draw.rect(self.screen, GOLD, black_table, 2, border_radius=5)
 
         # Table labels
-        white_label = self.font.render("White", True, 'black')
-        black_label = self.font.render("Black", True, 'white')
+        white_label = render_text(self.font, "White", 'black')
+        black_label = render_text(self.font, "Black", 'white')
 
         # Display table names
         self.screen.blit(white_label, (white_table.centerx - white_label.get_width() // 2, white_table.y + 10))
@@ -419,9 +523,9 @@ class ChessBoard:
         white_count = len(self.captured_white)
         black_count = len(self.captured_black)
 
-        count_font = pygame.font.Font('freesansbold.ttf', 18)
-        white_count_text = count_font.render(f"Pieces: {white_count}", True, 'black')
-        black_count_text = count_font.render(f"Pieces: {black_count}", True, 'white')
+        count_font = get_font(18)
+        white_count_text = render_text(count_font, f"Pieces: {white_count}", 'black')
+        black_count_text = render_text(count_font, f"Pieces: {black_count}", 'white')
 
         # Display piece count
         self.screen.blit(white_count_text, (white_table.centerx - white_count_text.get_width() // 2,
@@ -453,54 +557,49 @@ class ChessBoard:
         # Pulsating effect
         pulse_size = 4 + abs(math.sin(counter * 0.2) * 3)
 
-        # Check if white king is in check
-        white_king = next((p for p in self.white_pieces if p.piece_type == 'king'), None)
-        if white_king:
-            for black_piece in self.black_pieces:
-                black_moves = black_piece.get_valid_moves()
-                if white_king.position in black_moves:
-                    check = True
-                    x, y = white_king.position
-                    # Flip coordinates if needed
-                    screen_y = 7 - y if flipped else y
-
-                    # Calculate screen position
-                    screen_x = self.start_pos + x * self.square_size
-                    screen_y = self.start_pos + screen_y * self.square_size
-
-                    # Draw pulsing effect around king
-                    rect = [screen_x - pulse_size,
-                            screen_y - pulse_size,
-                            self.square_size + pulse_size * 2,
-                            self.square_size + pulse_size * 2]
-
-                    pygame.draw.rect(self.screen, DARK_RED, rect, int(pulse_size), border_radius=5)
-
-        # Check if black king is in check
-        black_king = next((p for p in self.black_pieces if p.piece_type == 'king'), None)
-        if black_king:
-            for white_piece in self.white_pieces:
-                white_moves = white_piece.get_valid_moves()
-                if black_king.position in white_moves:
-                    check = True
-                    x, y = black_king.position
-                    # Flip coordinates if needed
-                    screen_y = 7 - y if flipped else y
-
-                    # Calculate screen position
-                    screen_x = self.start_pos + x * self.square_size
-                    screen_y = self.start_pos + screen_y * self.square_size
-
-                    # Draw pulsing effect around king
-                    rect = [screen_x - pulse_size,
-                            screen_y - pulse_size,
-                            self.square_size + pulse_size * 2,
-                            self.square_size + pulse_size * 2]
-
-                    pygame.draw.rect(self.screen, DARK_BLUE, rect, int(pulse_size), border_radius=5)
+        # Check if either king is attacked, white king outlined red and black king blue
+        in_check = self.status().in_check
+        for color, outline in ((WHITE, DARK_RED), (BLACK, DARK_BLUE)):
+            if not in_check[COLOR_INDEX[color]]:
+                continue
+            check = True
+            x, y = square_position(self.pos.king_square(COLOR_INDEX[color]))
+            # Flip coordinates if needed
+            screen_y = 7 - y if flipped else y
+
+            # Calculate screen position
+            screen_x = self.start_pos + x * self.square_size
+            screen_y = self.start_pos + screen_y * self.square_size
+
+            # Draw pulsing effect around king
+            rect = [screen_x - pulse_size,
+                    screen_y - pulse_size,
+                    self.square_size + pulse_size * 2,
+                    self.square_size + pulse_size * 2]
+
+            pygame.draw.rect(self.screen, outline, rect, int(pulse_size), border_radius=5)
 
         return check
 
+    def get_hanging_pieces(self, color):
+        # Pieces the opponent can win material on by static exchange evaluation
+        hanging = self.status().hanging
+        squares = hanging.get(color)
+        if squares is None:
+            squares = hanging[color] = hanging_pieces(self.pos, COLOR_INDEX[color])
+        return [self.piece_squares[square] for square in squares]
+
+    def draw_hanging_pieces(self, color, flipped=False):
+        # Orange frame around every hanging piece of color
+        for piece in self.get_hanging_pieces(color):
+            x, y = piece.position
+            screen_y = 7 - y if flipped else y
+            rect = [self.start_pos + x * self.square_size,
+                    self.start_pos + screen_y * self.square_size,
+                    self.square_size,
+                    self.square_size]
+            pygame.draw.rect(self.screen, ORANGE, rect, 4, border_radius=5)
+
     def draw_castling(self, castling_moves, turn_step, flipped=False):
         # Draw castling move indicators
         color = RED if turn_step < 2 else BLUE
@@ -528,8 +627,8 @@ class ChessBoard:
             pygame.draw.circle(self.screen, color, (r_screen_x, r_screen_y + 20), 10)
 
             # Add labels
-            king_label = self.font.render("King", True, 'black')
-            rook_label = self.font.render("Rook", True, 'black')
+            king_label = render_text(self.font, "King", 'black')
+            rook_label = render_text(self.font, "Rook", 'black')
 
             # Add background for text
             king_bg = pygame.Rect(k_screen_x - 25, k_screen_y + 30, 50, 20)
@@ -541,6 +640,19 @@ class ChessBoard:
             self.screen.blit(king_label, (k_screen_x - king_label.get_width() // 2, k_screen_y + 30))
             self.screen.blit(rook_label, (r_screen_x - rook_label.get_width() // 2, r_screen_y + 30))
 
+    def castling_rect(self, castling_moves, flipped=False):
+        # Screen area draw_castling paints: the squares and the labels hanging below them
+        rect = None
+        for king_pos, rook_pos in castling_moves:
+            for position, text in ((king_pos, "King"), (rook_pos, "Rook")):
+                square = self.square_rect(position, flipped)
+                label = render_text(self.font, text, 'black')
+                label_rect = label.get_rect(midtop=(square.centerx, square.centery + 30))
+                background = pygame.Rect(square.centerx - 25, square.centery + 30, 50, 20)
+                area = square.union(label_rect).union(background)
+                rect = area if rect is None else rect.union(area)
+        return rect
+
     def draw_promotion(self, color, turn_step):
         # Panel for promotion selection
         panel_rect = pygame.Rect(850, 200, 300, 450)
@@ -548,8 +660,8 @@ class ChessBoard:
         pygame.draw.rect(self.screen, GOLD, panel_rect, 4, border_radius=15)
 
         # Add title
-        title_font = pygame.font.Font('freesansbold.ttf', 28)
-        title = title_font.render("Promote Pawn", True, CREAM_WHITE)
+        title_font = get_font(28)
+        title = render_text(title_font, "Promote Pawn", CREAM_WHITE)
         self.screen.blit(title, (panel_rect.centerx - title.get_width() // 2, panel_rect.y + 20))
 
         # Draw divider
@@ -559,8 +671,8 @@ class ChessBoard:
         # Display promotion options
         promotions = PROMOTION_PIECES
         for i, piece_type in enumerate(promotions):
-            # Create piece for option
-            piece = ChessPiece(piece_type, color, (0, 0), self)
+            # Shared sprite for the option
+            piece_img = piece_sprite(color, piece_type, board_size_for(piece_type))
 
             # Make button for each option
             option_rect = pygame.Rect(panel_rect.x + 50, panel_rect.y + 80 + i * 90, 200, 70)
@@ -574,202 +686,231 @@ class ChessBoard:
             pygame.draw.rect(self.screen, GOLD, option_rect, 2, border_radius=10)
 
             # Draw piece image
-            self.screen.blit(piece.image,
-                           (option_rect.x + 20, option_rect.y + (option_rect.height - piece.image.get_height()) // 2))
+            self.screen.blit(piece_img,
+                           (option_rect.x + 20, option_rect.y + (option_rect.height - piece_img.get_height()) // 2))
 
             # Display piece name
             piece_name = piece_type.capitalize()
-            name_text = self.font.render(piece_name, True, 'black')
+            name_text = render_text(self.font, piece_name, 'black')
             self.screen.blit(name_text, (option_rect.x + 100, option_rect.centery - name_text.get_height() // 2))
 
         # Draw instruction
         pygame.draw.rect(self.screen, GRAY, [0, 800, WIDTH - 200, 100])
         pygame.draw.rect(self.screen, GOLD, [0, 800, WIDTH - 200, 100], 5)
 
-        instruction = self.big_font.render('Select Piece to Promote Pawn', True, 'black')
+        instruction = render_text(self.big_font, 'Select Piece to Promote Pawn', 'black')
         self.screen.blit(instruction, (20, 820))
 
-    def is_king_in_check(self, color):
-        # Find the king
-        if color == WHITE:
-            king = next((p for p in self.white_pieces if p.piece_type == 'king'), None)
-            opponent_pieces = self.black_pieces
-        else:
-            king = next((p for p in self.black_pieces if p.piece_type == 'king'), None)
-            opponent_pieces = self.white_pieces
-
-        # If king not found, return False
-        if not king:
-            return False
+    def status(self):
+        """BoardStatus of the current position, computed on the first call after a move"""
+        status = self._status
+        if status is None or status.key != self.pos.hash:
+            status = self._status = BoardStatus(self.pos)
+        return status
 
-        # Check if any opponent piece can capture the king
-        for piece in opponent_pieces:
-            if king.position in piece.get_valid_moves():
-                return True
-
-        return False
+    def is_king_in_check(self, color):
+        # Look outward from the king square, for positions tried out between make and unmake
+        return is_in_check(self.pos, COLOR_INDEX[color])
 
     def is_square_under_attack(self, position, attacking_color):
-        # Get opponent pieces
-        if attacking_color == WHITE:
-            opponent_pieces = self.white_pieces
-        else:
-            opponent_pieces = self.black_pieces
-
-        # Check if any piece can move to target
-        for piece in opponent_pieces:
-            if position in piece.get_valid_moves():
-                return True
-
-        return False
+        # Reverse lookup from the target square with the attack tables
+        return is_square_attacked(self.pos, square_index(position), COLOR_INDEX[attacking_color])
 
     def is_checkmate(self, color):
-        # If not in check, can't be checkmate
-        if not self.is_king_in_check(color):
-            return False
-
-        # Try all possible moves to escape check
-        pieces_to_check = self.white_pieces if color == WHITE else self.black_pieces
-
-        for piece in pieces_to_check:
-            valid_moves = piece.get_valid_moves()
-            original_position = piece.position
-
-            # Try each move
-            for move in valid_moves:
-                # Keep track of captured piece
-                captured_piece = self.get_piece_at_position(move)
-                captured_black = None
-                captured_white = None
-
-                # Handle piece capture
-                if captured_piece is not None:
-                    if captured_piece.color == WHITE:
-                        self.white_pieces.remove(captured_piece)
-                        captured_white = captured_piece
-                    else:
-                        self.black_pieces.remove(captured_piece)
-                        captured_black = captured_piece
-
-                # Simulate the move
-                piece.position = move
-
-                # Check if king is still in check
-                still_in_check = self.is_king_in_check(color)
-
-                # Undo the move
-                piece.position = original_position
-
-                # Put back any captured piece
-                if captured_white is not None:
-                    self.white_pieces.append(captured_white)
-                if captured_black is not None:
-                    self.black_pieces.append(captured_black)
-
-                # If this move escapes check, not checkmate
-                if not still_in_check:
-                    return False
-
-        # If no move escapes check, it's checkmate
-        return True
-
-    def check_castling(self, color):
-        castling_moves = []
-
-        # Can't castle while in check
-        if self.is_king_in_check(color):
-            return castling_moves
-
-        # Find king and rooks
-        if color == WHITE:
-            king = next((p for p in self.white_pieces if p.piece_type == 'king'), None)
-            rooks = [p for p in self.white_pieces if p.piece_type == 'rook']
-            opponent_color = BLACK
+        # Only the side to move can be mated
+        return COLOR_INDEX[color] == self.pos.side and self.status().checkmate
+
+    def endgame_verdict(self):
+        # 'white', 'black' or 'draw' with best play in a KPK/KRK/KQK ending, else None
+        result = self.status().verdict
+        if result is None:
+            return None
+        if result == DRAW:
+            return 'draw'
+        return COLOR_NAMES[self.pos.side if result == WIN else self.pos.side ^ 1]
+
+    def draw_endgame_verdict(self):
+        # Bitbase result under the captured pieces panel
+        verdict = self.endgame_verdict()
+        if verdict is None:
+            return
+        text = 'Endgame: Draw' if verdict == 'draw' else f'Endgame: {verdict.capitalize()} wins'
+        label = render_text(self.font, text, CREAM_WHITE)
+        self.screen.blit(label, (1000 - label.get_width() // 2, 675 - label.get_height() // 2))
+
+    def get_legal_moves(self):
+        # All legal moves for the side to move, encoded as in position.encode_move; shared, do not modify
+        return self.status().legal_moves
+
+    def add_piece(self, piece):
+        # Put a piece on the board and register it in the bitboards
+        square = square_index(piece.position)
+        self.pos.add_piece(piece.color_index, TYPE_INDEX[piece.piece_type], square)
+        self.piece_squares[square] = piece
+        piece.on_board = True
+        pieces = self.white_pieces if piece.color == WHITE else self.black_pieces
+        piece.list_index = len(pieces)
+        pieces.append(piece)
+
+    def remove_piece(self, piece):
+        # Take a piece off the board (captures, promotions)
+        square = square_index(piece.position)
+        self.pos.remove_piece(square)
+        self.piece_squares[square] = None
+        piece.on_board = False
+        self._swap_remove(piece)
+
+    def relocate_piece(self, piece, old_position, new_position):
+        # Called by ChessPiece when its position changes
+        from_square = square_index(old_position)
+        to_square = square_index(new_position)
+        self.pos.move_piece(from_square, to_square)
+        self.piece_squares[from_square] = None
+        self.piece_squares[to_square] = piece
+
+    def make_move(self, move):
+        """Play an encoded move (see position.encode_move) on the board.
+
+        Updates the bitboards, the piece objects, has_moved flags and the
+        en passant squares, and pushes an undo record for unmake_move.
+        Castling is a king move of two files. Returns the captured piece.
+        """
+        pos = self.pos
+        from_square = move & 63
+        to_square = move >> 6 & 63
+        promotion = move >> 12
+        squares = self.piece_squares
+        piece = squares[from_square]
+
+        if pos.make_move(move) != EMPTY:
+            captured_square = pos.history[-1][2]
+            captured = squares[captured_square]
+            squares[captured_square] = None
+            captured.on_board = False
+            self._swap_remove(captured)
         else:
-            king = next((p for p in self.black_pieces if p.piece_type == 'king'), None)
-            rooks = [p for p in self.black_pieces if p.piece_type == 'rook']
-            opponent_color = WHITE
-
-        # If king has moved, can't castle
-        if not king or king.has_moved:
-            return castling_moves
-
-        # Check each rook for castling
-        for rook in rooks:
-            # Skip if rook has moved
-            if rook.has_moved:
-                continue
+            captured = None
+
+        squares[from_square] = None
+        squares[to_square] = piece
+        piece._position = SQUARE_POSITIONS[to_square]
+        had_moved = piece.has_moved
+        piece.has_moved = True
+
+        rook = None
+        rook_had_moved = False
+        if promotion:
+            # The pawn's record becomes the new piece, it keeps its square and list slot
+            piece.piece_type = TYPE_NAMES[promotion]
+        elif piece.piece_type == 'king' and abs(to_square - from_square) == 2:
+            if to_square > from_square:
+                rook_from, rook_to = from_square + 3, from_square + 1
+            else:
+                rook_from, rook_to = from_square - 4, from_square - 1
+            rook = squares[rook_from]
+            squares[rook_from] = None
+            squares[rook_to] = rook
+            rook._position = SQUARE_POSITIONS[rook_to]
+            rook_had_moved = rook.has_moved
+            rook.has_moved = True
+
+        self._undo_stack.append((piece, had_moved, captured, rook, rook_had_moved,
+                                 promotion, self.white_ep, self.black_ep))
+
+        # Update en passant square of the side that moved
+        if piece.piece_type == 'pawn' and abs(to_square - from_square) == 16:
+            ep_square = SQUARE_POSITIONS[(from_square + to_square) >> 1]
+        else:
+            ep_square = (100, 100)
+        if piece.color == WHITE:
+            self.white_ep = ep_square
+        else:
+            self.black_ep = ep_square
+
+        return captured
+
+    def unmake_move(self):
+        # Restore the board to before the last make_move
+        (piece, had_moved, captured, rook, rook_had_moved,
+         promotion, self.white_ep, self.black_ep) = self._undo_stack.pop()
+        move = self.pos.history[-1][0]
+        self.pos.unmake_move()
+
+        from_square = move & 63
+        to_square = move >> 6 & 63
+        squares = self.piece_squares
+
+        if promotion:
+            piece.piece_type = 'pawn'
+        elif rook is not None:
+            rook_from, rook_to = (from_square + 3, from_square + 1) if to_square > from_square \
+                else (from_square - 4, from_square - 1)
+            squares[rook_to] = None
+            squares[rook_from] = rook
+            rook._position = SQUARE_POSITIONS[rook_from]
+            rook.has_moved = rook_had_moved
+
+        squares[to_square] = None
+        squares[from_square] = piece
+        piece._position = SQUARE_POSITIONS[from_square]
+        piece.has_moved = had_moved
+
+        if captured is not None:
+            captured_square = square_index(captured.position)
+            squares[captured_square] = captured
+            captured.on_board = True
+            # Back into its old slot, the piece swapped into it goes back to the end
+            pieces = self.white_pieces if captured.color == WHITE else self.black_pieces
+            index = captured.list_index
+            if index < len(pieces):
+                moved = pieces[index]
+                moved.list_index = len(pieces)
+                pieces.append(moved)
+                pieces[index] = captured
+            else:
+                pieces.append(captured)
+
+    def _swap_remove(self, piece):
+        # Remove from the piece list by swapping with the last entry, piece keeps its old list_index
+        pieces = self.white_pieces if piece.color == WHITE else self.black_pieces
+        last = pieces.pop()
+        if piece.list_index < len(pieces):
+            pieces[piece.list_index] = last
+            last.list_index = piece.list_index
 
-            # Get positions
-            king_x, king_y = king.position
-            rook_x, rook_y = rook.position
-
-            # Kingside vs queenside castling
-            if rook_x > king_x:  # Kingside
-                # Check squares between king and rook
-                path_squares = [(king_x + 1, king_y), (king_x + 2, king_y)]
-                # Final positions
-                king_dest = (king_x + 2, king_y)
-                rook_dest = (king_x + 1, king_y)
-            else:  # Queenside
-                # Check squares between king and rook
-                path_squares = [(king_x - 1, king_y), (king_x - 2, king_y)]
-                # Extra square for queenside
-                extra_square = (king_x - 3, king_y)
-                # Final positions
-                king_dest = (king_x - 2, king_y)
-                rook_dest = (king_x - 1, king_y)
-
-                # For queenside, check one more square
-                if extra_square in self.get_all_piece_positions():
-                    continue
-
-            # Path must be clear and safe
-            path_safe = True
-
-            # Check if path is clear
-            for square in path_squares:
-                if square in self.get_all_piece_positions():
-                    path_safe = False
-                    break
-
-            # Check if squares are safe
-            for square in path_squares:
-                if self.is_square_under_attack(square, opponent_color):
-                    path_safe = False
-                    break
-
-            # Add castling move if ok
-            if path_safe:
-                castling_moves.append((king_dest, rook_dest))
-
-        return castling_moves
+    @property
+    def hash(self):
+        # 64-bit Zobrist key of the current position
+        return self.pos.hash
 
     def get_piece_at_position(self, position):
         # Find piece at position
-        for piece in self.white_pieces + self.black_pieces:
-            if piece.position == position:
-                return piece
-        return None
+        if not on_board(position):
+            return None
+        return self.piece_squares[square_index(position)]
 
     def get_all_piece_positions(self):
         # Get all piece positions
-        return [piece.position for piece in self.white_pieces + self.black_pieces]
+        return [square_position(sq) for sq in iter_bits(self.pos.occupied)]
 
     def get_piece_positions(self, color):
         # Get positions of pieces by color
         if color == WHITE:
-            return [piece.position for piece in self.white_pieces]
+            return [square_position(sq) for sq in iter_bits(self.pos.colors[0])]
         else:
-            return [piece.position for piece in self.black_pieces]
+            return [square_position(sq) for sq in iter_bits(self.pos.colors[1])]
 
     def get_opponent_positions(self, color):
         # Get opponent piece positions
         if color == WHITE:
-            return [piece.position for piece in self.black_pieces]
+            return [square_position(sq) for sq in iter_bits(self.pos.colors[1])]
         else:
-            return [piece.position for piece in self.white_pieces]
+            return [square_position(sq) for sq in iter_bits(self.pos.colors[0])]
+
+    def is_occupied(self, position):
+        # Bit test instead of scanning the piece lists
+        return on_board(position) and self.pos.is_occupied(square_index(position))
 
     def get_en_passant_square(self, color):
         # Get en passant target square
-        return self.white_ep if color == WHITE else self.black_ep
\ No newline at end of file
+        return self.white_ep if color == WHITE else self.black_ep
@@ -0,0 +1,53 @@
+"""Computer opponent built on the chess_rules core.
+
+Like chess_rules this package has no graphics, so the engine can be run
+from scripts and benchmarks as well as from the game.
+
+The names below are imported on first use, so running one of the command
+line modules (python -m chess_engine.book, .bitbase, .bench) does not load
+it through the package first.
+"""
+import importlib
+
+_EXPORTS = {
+    'evaluate': ('evaluate', 'evaluate'),
+    'Searcher': ('search', 'Searcher'),
+    'SearchResult': ('search', 'SearchResult'),
+    'allocate_time': ('search', 'allocate_time'),
+    'is_mate_score': ('search', 'is_mate_score'),
+    'INFINITY': ('search', 'INFINITY'),
+    'MATE_SCORE': ('search', 'MATE_SCORE'),
+    'MAX_PLY': ('search', 'MAX_PLY'),
+    'TranspositionTable': ('tt', 'TranspositionTable'),
+    'table_bytes': ('tt', 'table_bytes'),
+    'BOUND_EXACT': ('tt', 'BOUND_EXACT'),
+    'BOUND_LOWER': ('tt', 'BOUND_LOWER'),
+    'BOUND_UPPER': ('tt', 'BOUND_UPPER'),
+    'EngineWorker': ('worker', 'EngineWorker'),
+    'game_record': ('worker', 'game_record'),
+    'encode_planes': ('batch_eval', 'encode_planes'),
+    'evaluate_planes': ('batch_eval', 'evaluate_planes'),
+    'evaluate_batch': ('batch_eval', 'evaluate_batch'),
+    'game_positions': ('batch_eval', 'game_positions'),
+    'OpeningBook': ('book', 'OpeningBook'),
+    'open_book': ('book', 'open_book'),
+    'opening_name': ('book', 'opening_name'),
+    'polyglot_key': ('book', 'polyglot_key'),
+    'probe_bitbase': ('bitbase', 'probe'),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    try:
+        module, attribute = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f'.{module}', __name__), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,69 @@
+"""Vectorized evaluation of many positions at once with NumPy.
+
+Positions are encoded as 12x64 planes, one 0/1 plane per piece code
+(White pawn .. Black king, as in chess_rules), and a whole batch is scored
+with one matrix product against the material + piece-square weights of
+chess_rules.psqt. Meant for bulk work such as annotating games or generating
+self-play data; the search keeps using evaluate(), which gives the same
+scores one position at a time.
+"""
+import numpy as np
+
+from chess_rules.position import WHITE_INDEX
+from chess_rules.psqt import MG_TABLE, EG_TABLE, PHASE_WEIGHTS, MAX_PHASE
+
+PLANES = 12
+
+# (768, 3) weight matrix matching planes.reshape(n, 768): middlegame and endgame
+# values signed from White's side, and phase weights. Float so the product
+# runs through BLAS; every sum is a small integer and stays exact.
+WEIGHTS = np.stack([
+    np.array(MG_TABLE).reshape(PLANES * 64),
+    np.array(EG_TABLE).reshape(PLANES * 64),
+    np.repeat(PHASE_WEIGHTS * 2, 64),
+], axis=1).astype(np.float32)
+
+
+def encode_planes(positions):
+    """(n, 12, 64) uint8 array with a 1 wherever piece code p stands on square s"""
+    boards = np.array([pos.pieces[0] + pos.pieces[1] for pos in positions], dtype=np.uint64)
+    boards = boards.reshape(len(positions), PLANES)
+    # little-endian bytes of each bitboard unpacked low bit first give square order
+    as_bytes = boards.astype('<u8').view(np.uint8).reshape(len(positions), PLANES, 8)
+    return np.unpackbits(as_bytes, axis=2, bitorder='little')
+
+
+def side_to_move(positions):
+    # (n,) array, 1 where White is to move
+    return np.array([pos.side == WHITE_INDEX for pos in positions], dtype=bool)
+
+
+def evaluate_planes(planes, white_to_move):
+    """Scores in centipawns for the side to move of a batch of encoded positions"""
+    planes = np.asarray(planes)
+    flat = planes.reshape(len(planes), PLANES * 64).astype(np.float32)
+    mg, eg, phase = (flat @ WEIGHTS).round().astype(np.int64).T
+    phase = np.minimum(phase, MAX_PHASE)
+    score = (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+    return np.where(white_to_move, score, -score).astype(np.int32)
+
+
+def evaluate_batch(positions):
+    """evaluate() for every position, as an (n,) int32 array"""
+    positions = list(positions)
+    if not positions:
+        return np.zeros(0, dtype=np.int32)
+    return evaluate_planes(encode_planes(positions), side_to_move(positions))
+
+
+def game_positions(pos):
+    """Copies of every position of the game played into pos, from the start to now"""
+    history = pos.history
+    pos = pos.copy()
+    pos.history = list(history)
+    positions = [pos.copy()]
+    while pos.history:
+        pos.unmake_move()
+        positions.append(pos.copy())
+    positions.reverse()
+    return positions
@@ -0,0 +1,110 @@
+"""Search benchmark: nodes/second with one worker versus several.
+
+Runs the same positions with threads=1 and threads=N for a fixed time per
+position and prints the combined nodes/second of each run and the ratio.
+With lazy SMP the ratio should stay close to N while there are free cores.
+--check-eval instead walks every line a few plies deep and compares the
+incrementally kept evaluation with one recomputed from the pieces.
+
+    python -m chess_engine.bench --threads 16 --time 10
+    python -m chess_engine.bench --threads 4 --time 5 --fen "<fen>"
+    python -m chess_engine.bench --check-eval 3
+"""
+import argparse
+import os
+import sys
+import time
+
+from chess_rules.move import move_name
+from chess_rules.movegen import generate_legal_moves
+from chess_rules.position import START_FEN, Position
+from .evaluate import evaluate, evaluate_full
+from .worker import EngineWorker
+
+BENCH_POSITIONS = [
+    START_FEN,
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/2pp4/2PP4/2N1PN2/PP2BPPP/R1BQ1RK1 w - - 0 8",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def run(threads, fens, seconds, hash_mb, out=sys.stdout):
+    """Search every position for `seconds`, returns (nodes, elapsed)"""
+    engine = EngineWorker(hash_mb, threads)
+    total_nodes = 0
+    total_time = 0.0
+    try:
+        for fen in fens:
+            engine.start_search(Position.from_fen(fen), seconds)
+            start = time.perf_counter()
+            while engine.poll() is None:
+                time.sleep(0.005)
+            # count the nodes of every worker, the helpers stop a moment after the main one
+            result = engine.wait_helpers()
+            elapsed = time.perf_counter() - start
+            total_nodes += result.nodes
+            total_time += elapsed
+            print(f"  threads {threads:<3} depth {result.depth:<3} {move_name(result.move):<6} "
+                  f"{result.nodes:>9} nodes  {result.nodes / max(elapsed, 1e-9):>10,.0f} nodes/s  "
+                  f"hash {result.hashfull / 10:.1f}% full", file=out)
+    finally:
+        engine.close()
+    return total_nodes, total_time
+
+
+def check_evaluation(fens, depth, out=sys.stdout):
+    """Compare evaluate() with evaluate_full() in every position up to depth plies, returns the mismatches"""
+    def walk(pos, depth):
+        checked, wrong = 1, 0
+        if evaluate(pos) != evaluate_full(pos):
+            wrong += 1
+            print(f"  {pos.to_fen()}: incremental {evaluate(pos)}, recomputed {evaluate_full(pos)}", file=out)
+        if depth > 0:
+            for move in generate_legal_moves(pos):
+                pos.make_move(move)
+                sub_checked, sub_wrong = walk(pos, depth - 1)
+                pos.unmake_move()
+                checked += sub_checked
+                wrong += sub_wrong
+        return checked, wrong
+
+    failures = 0
+    for fen in fens:
+        checked, wrong = walk(Position.from_fen(fen), depth)
+        print(f"  {checked - wrong}/{checked} positions agree: {fen}", file=out)
+        failures += wrong
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lazy SMP search scaling benchmark")
+    parser.add_argument('-t', '--threads', type=int, default=os.cpu_count() or 1,
+                        help="worker processes to compare against one (default: all cores)")
+    parser.add_argument('--time', type=float, default=5.0, help="seconds per position")
+    parser.add_argument('--hash', type=int, default=64, help="transposition table size in MB")
+    parser.add_argument('--fen', help="benchmark this position instead of the built-in set")
+    parser.add_argument('--check-eval', type=int, metavar='DEPTH',
+                        help="check the incremental evaluation to DEPTH plies instead of benchmarking")
+    args = parser.parse_args(argv)
+
+    fens = [args.fen] if args.fen else BENCH_POSITIONS
+    if args.check_eval is not None:
+        return 1 if check_evaluation(fens, args.check_eval) else 0
+    single_nodes, single_time = run(1, fens, args.time, args.hash)
+    single_nps = single_nodes / max(single_time, 1e-9)
+    print(f"1 worker: {single_nps:,.0f} nodes/s")
+    if args.threads <= 1:
+        return 0
+
+    smp_nodes, smp_time = run(args.threads, fens, args.time, args.hash)
+    smp_nps = smp_nodes / max(smp_time, 1e-9)
+    speedup = smp_nps / max(single_nps, 1e-9)
+    print(f"{args.threads} workers: {smp_nps:,.0f} nodes/s")
+    print(f"Scaling: {speedup:.2f}x ({speedup / args.threads:.0%} of linear)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
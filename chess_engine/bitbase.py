@@ -0,0 +1,412 @@
+"""Endgame bitbases for king and pawn, rook or queen against a lone king.
+
+Each table holds one bit per position telling whether the stronger side
+wins with perfect play; the lone king can at best draw, so that is the
+whole win/draw/loss result. Tables are built by retrograde analysis from
+the checkmates backwards and stored as bit-packed files of 64 KB: for each
+side to move, 64 * 64 * 64 bits indexed by the stronger king, the lone king
+and the piece, with the stronger side as White. Probing is a bit lookup.
+
+    python -m chess_engine.bitbase --generate
+    python -m chess_engine.bitbase --verify --samples 200 --depth 3
+    python -m chess_engine.bitbase --verify --full
+
+The full check recomputes every table from the move generator of the rules
+core instead of the hand-written king and piece moves of --generate, and
+solves it by a backward search from the mates rather than the fixpoint,
+then compares every legal position.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from chess_rules.attack_tables import KING_ATTACKS, PAWN_ATTACKS
+from chess_rules.movegen import rook_attacks, bishop_attacks, generate_legal_moves, is_in_check
+from chess_rules.position import (Position, PAWN, ROOK, QUEEN, KING, WHITE_INDEX, BLACK_INDEX,
+                                  TYPE_NAMES, iter_bits, lsb, popcount)
+from chess_rules.result import has_insufficient_material
+
+WIN, DRAW, LOSS = 1, 0, -1  # for the side to move
+
+BITBASE_DIR = os.path.join(os.path.dirname(__file__), 'bitbases')
+TABLE_NAMES = {PAWN: 'kpk', ROOK: 'krk', QUEEN: 'kqk'}
+
+SIDE_SIZE = 64 * 64 * 64  # positions per side to move
+TABLE_BYTES = 2 * SIDE_SIZE // 8
+MAX_TRIES = 50  # random positions tried per verified one, most are not settled by a shallow search
+
+_tables = {}  # piece type -> packed bytes, None when the file is missing
+
+
+def _index(strong_king, weak_king, piece):
+    return strong_king << 12 | weak_king << 6 | piece
+
+
+def _piece_attacks(piece_type, square, occupied):
+    if piece_type == PAWN:
+        return PAWN_ATTACKS[WHITE_INDEX][square]
+    if piece_type == ROOK:
+        return rook_attacks(square, occupied)
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+
+
+def _build_graph(piece_type, promotions):
+    # Successor lists of every legal position, as flat (owner, successor) index
+    # pairs, plus the positions settled without looking further
+    strong_owner, strong_next = array('i'), array('i')
+    weak_owner, weak_next = array('i'), array('i')
+    strong_won = np.zeros(SIDE_SIZE, dtype=bool)  # promotes into a won position
+    weak_mated = np.zeros(SIDE_SIZE, dtype=bool)
+    weak_safe = np.zeros(SIDE_SIZE, dtype=bool)  # can take the piece, or is stalemated
+
+    for strong_king in range(64):
+        for weak_king in range(64):
+            if strong_king == weak_king or KING_ATTACKS[strong_king] >> weak_king & 1:
+                continue
+            occupied = 1 << strong_king | 1 << weak_king
+            king_moves = KING_ATTACKS[strong_king] & ~KING_ATTACKS[weak_king]
+            for piece in range(64):
+                if occupied >> piece & 1 or (piece_type == PAWN and not 8 <= piece < 56):
+                    continue
+                index = _index(strong_king, weak_king, piece)
+                attacks = _piece_attacks(piece_type, piece, occupied)
+                in_check = attacks >> weak_king & 1
+
+                # stronger side to move, only legal when the lone king is not in check
+                if not in_check:
+                    for to_square in iter_bits(king_moves & ~(1 << piece)):
+                        strong_owner.append(index)
+                        strong_next.append(_index(to_square, weak_king, piece))
+                    if piece_type != PAWN:
+                        for to_square in iter_bits(attacks & ~occupied):
+                            strong_owner.append(index)
+                            strong_next.append(_index(strong_king, weak_king, to_square))
+                    elif not occupied >> (piece + 8) & 1:
+                        to_square = piece + 8
+                        if to_square >= 56:
+                            # promote to a queen, or a rook where the queen stalemates
+                            target = _index(strong_king, weak_king, to_square)
+                            strong_won[index] = any(table[target] for table in promotions)
+                        else:
+                            strong_owner.append(index)
+                            strong_next.append(_index(strong_king, weak_king, to_square))
+                            if piece < 16 and not occupied >> (piece + 16) & 1:
+                                strong_owner.append(index)
+                                strong_next.append(_index(strong_king, weak_king, piece + 16))
+
+                # lone king to move, sliders see through the square it leaves
+                guarded = KING_ATTACKS[strong_king] | _piece_attacks(piece_type, piece, 1 << strong_king)
+                escapes = KING_ATTACKS[weak_king] & ~guarded
+                if escapes >> piece & 1:
+                    weak_safe[index] = True
+                elif not escapes:
+                    if in_check:
+                        weak_mated[index] = True
+                    else:
+                        weak_safe[index] = True
+                for to_square in iter_bits(escapes & ~(1 << piece)):
+                    weak_owner.append(index)
+                    weak_next.append(_index(strong_king, to_square, piece))
+
+    return (np.frombuffer(strong_owner, dtype=np.int32), np.frombuffer(strong_next, dtype=np.int32),
+            np.frombuffer(weak_owner, dtype=np.int32), np.frombuffer(weak_next, dtype=np.int32),
+            strong_won, weak_mated, weak_safe)
+
+
+def generate(piece_type, promotions=()):
+    """(strong to move, weak to move) bool arrays of won positions for one table.
+
+    promotions are the weak-to-move arrays of the tables a pawn can promote
+    into, needed for KPK.
+    """
+    strong_owner, strong_next, weak_owner, weak_next, strong_won, weak_mated, weak_safe = \
+        _build_graph(piece_type, promotions)
+    weak_moves = np.bincount(weak_owner, minlength=SIDE_SIZE)
+    can_lose = ~weak_safe & (weak_moves > 0)
+
+    # Grow the won sets from the mates until nothing changes: the stronger side
+    # wins with one move into a won position, the lone king loses when all of
+    # its moves lead into one
+    strong_wins = strong_won.copy()
+    weak_loses = weak_mated.copy()
+    while True:
+        hits = np.bincount(strong_owner, weights=weak_loses[strong_next], minlength=SIDE_SIZE)
+        new_strong = strong_won | (hits > 0)
+        lost = np.bincount(weak_owner, weights=new_strong[weak_next], minlength=SIDE_SIZE)
+        new_weak = weak_mated | (can_lose & (lost == weak_moves))
+        if np.array_equal(new_strong, strong_wins) and np.array_equal(new_weak, weak_loses):
+            return strong_wins, weak_loses
+        strong_wins, weak_loses = new_strong, new_weak
+
+
+def table_path(piece_type, directory=BITBASE_DIR):
+    return os.path.join(directory, TABLE_NAMES[piece_type] + '.bin')
+
+
+def generate_all(directory=BITBASE_DIR, out=sys.stdout):
+    """Build and write every table, the queen and rook ones first for KPK promotions"""
+    os.makedirs(directory, exist_ok=True)
+    weak_tables = []
+    for piece_type in (QUEEN, ROOK, PAWN):
+        start = time.perf_counter()
+        strong_wins, weak_loses = generate(piece_type, weak_tables if piece_type == PAWN else ())
+        weak_tables.append(weak_loses)
+        data = np.packbits(np.concatenate((strong_wins, weak_loses)), bitorder='little').tobytes()
+        with open(table_path(piece_type, directory), 'wb') as f:
+            f.write(data)
+        _tables[piece_type] = data
+        print(f"K{TYPE_NAMES[piece_type][0].upper()}K: {int(strong_wins.sum())} wins with the piece side "
+              f"to move, {int(weak_loses.sum())} with the lone king to move "
+              f"({time.perf_counter() - start:.1f}s)", file=out)
+
+
+def _table(piece_type):
+    if piece_type not in _tables:
+        try:
+            with open(table_path(piece_type), 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = None
+        if data is not None and len(data) != TABLE_BYTES:
+            raise ValueError(f"Invalid bitbase {table_path(piece_type)} of {len(data)} bytes")
+        _tables[piece_type] = data
+    return _tables[piece_type]
+
+
+def probe(pos):
+    """WIN, DRAW or LOSS for the side to move if pos is a KPK, KRK or KQK ending, else None"""
+    if popcount(pos.occupied) != 3:
+        return None
+    white = pos.colors[WHITE_INDEX]
+    strong = WHITE_INDEX if white & (white - 1) else BLACK_INDEX
+    piece = lsb(pos.colors[strong] & ~pos.pieces[strong][KING])
+    piece_type = pos.squares[piece] % 6
+    if piece_type not in TABLE_NAMES:
+        return None
+    data = _table(piece_type)
+    if data is None:
+        return None
+
+    strong_king = lsb(pos.pieces[strong][KING])
+    weak_king = lsb(pos.pieces[strong ^ 1][KING])
+    if strong == BLACK_INDEX:
+        # the tables have the stronger side as White, mirror the ranks
+        strong_king ^= 56
+        weak_king ^= 56
+        piece ^= 56
+    index = _index(strong_king, weak_king, piece)
+    if pos.side != strong:
+        index += SIDE_SIZE
+    if not data[index >> 3] >> (index & 7) & 1:
+        return DRAW
+    return WIN if pos.side == strong else LOSS
+
+
+def _solve(pos, depth, memo):
+    # Result for the side to move by full-width search with the rules core alone,
+    # None when mate, stalemate or a lost piece does not settle it within depth plies
+    moves = generate_legal_moves(pos)
+    if not moves:
+        return LOSS if is_in_check(pos, pos.side) else DRAW
+    if has_insufficient_material(pos):
+        return DRAW
+    if depth <= 0:
+        return None
+    key = (pos.hash, depth)
+    if key in memo:
+        return memo[key]
+    # a lone king can at best draw, so reaching that settles its side's result
+    ceiling = DRAW if pos.colors[pos.side] == pos.pieces[pos.side][KING] else WIN
+    best = LOSS
+    unsettled = False
+    for move in moves:
+        pos.make_move(move)
+        result = _solve(pos, depth - 1, memo)
+        pos.unmake_move()
+        if result is None:
+            unsettled = True
+        else:
+            best = max(best, -result)
+            if best == ceiling:
+                break
+    # an unsettled move could still be better than the best settled one
+    result = None if unsettled and best != ceiling else best
+    memo[key] = result
+    return result
+
+
+def _random_position(piece_type, rng):
+    # Legal position of the table with random squares, colors and side to move
+    while True:
+        strong_king, weak_king, piece = rng.sample(range(64), 3)
+        if piece_type == PAWN and not 8 <= piece < 56:
+            continue
+        strong = rng.randrange(2)
+        if strong == BLACK_INDEX:
+            strong_king, weak_king, piece = strong_king ^ 56, weak_king ^ 56, piece ^ 56
+        pos = Position()
+        pos.add_piece(strong, KING, strong_king)
+        pos.add_piece(strong ^ 1, KING, weak_king)
+        pos.add_piece(strong, piece_type, piece)
+        pos.set_state(rng.randrange(2), 0)
+        if KING_ATTACKS[strong_king] >> weak_king & 1 or is_in_check(pos, pos.side ^ 1):
+            continue
+        return pos
+
+
+def recompute(piece_type, promotions=None):
+    """(won, legal) bool arrays over both sides to move, rebuilt from the rules core.
+
+    won is True where the stronger side wins, in the table layout. promotions
+    maps the piece types a pawn can promote to onto their won arrays, needed
+    for KPK.
+    """
+    promotions = promotions or {}
+    won = np.zeros(2 * SIDE_SIZE, dtype=bool)
+    legal = np.zeros(2 * SIDE_SIZE, dtype=bool)
+    moves_left = np.zeros(2 * SIDE_SIZE, dtype=np.int32)
+    owners, successors = array('i'), array('i')
+    pos = Position()
+    for strong_king in range(64):
+        for weak_king in range(64):
+            if strong_king == weak_king:
+                continue
+            for piece in range(64):
+                if piece in (strong_king, weak_king) or (piece_type == PAWN and not 8 <= piece < 56):
+                    continue
+                pos.add_piece(WHITE_INDEX, KING, strong_king)
+                pos.add_piece(BLACK_INDEX, KING, weak_king)
+                pos.add_piece(WHITE_INDEX, piece_type, piece)
+                for side in (WHITE_INDEX, BLACK_INDEX):
+                    pos.set_state(side, 0)
+                    if is_in_check(pos, side ^ 1):
+                        continue
+                    index = _index(strong_king, weak_king, piece) + side * SIDE_SIZE
+                    legal[index] = True
+                    moves = generate_legal_moves(pos)
+                    if not moves:
+                        won[index] = side == BLACK_INDEX and is_in_check(pos, side)
+                        continue
+                    moves_left[index] = len(moves)
+                    for move in moves:
+                        pos.make_move(move)
+                        # a capture leaves two kings, a draw, so it has no successor
+                        if popcount(pos.occupied) == 3:
+                            king = pos.pieces[WHITE_INDEX][KING]
+                            target = _index(lsb(king), lsb(pos.pieces[BLACK_INDEX][KING]),
+                                            lsb(pos.colors[WHITE_INDEX] & ~king)) + (side ^ 1) * SIDE_SIZE
+                            promoted = move >> 12
+                            if not promoted:
+                                owners.append(index)
+                                successors.append(target)
+                            elif promoted in promotions and promotions[promoted][target]:
+                                won[index] = True
+                        pos.unmake_move()
+                pos.remove_piece(piece)
+                pos.remove_piece(weak_king)
+                pos.remove_piece(strong_king)
+
+    # Predecessors of every position, then walk back from the known wins: the
+    # stronger side wins with one move into a won position, the lone king
+    # loses once the last of its moves is found to lead into one
+    successors = np.frombuffer(successors, dtype=np.int32)
+    order = np.argsort(successors, kind='stable')
+    predecessors = np.frombuffer(owners, dtype=np.int32)[order].tolist()
+    starts = np.searchsorted(successors[order], np.arange(2 * SIDE_SIZE + 1)).tolist()
+    moves_left = moves_left.tolist()
+    queue = np.flatnonzero(won).tolist()
+    while queue:
+        target = queue.pop()
+        for index in predecessors[starts[target]:starts[target + 1]]:
+            if won[index]:
+                continue
+            if index >= SIDE_SIZE:
+                moves_left[index] -= 1
+                if moves_left[index]:
+                    continue
+            won[index] = True
+            queue.append(index)
+    return won, legal
+
+
+def verify_full(out=sys.stdout):
+    """Compare every legal position of every table with recompute(), returns the mismatches"""
+    failures = 0
+    promotions = {}
+    for piece_type in (QUEEN, ROOK, PAWN):
+        start = time.perf_counter()
+        won, legal = recompute(piece_type, promotions)
+        promotions[piece_type] = won
+        data = _table(piece_type)
+        if data is None:
+            print(f"{TABLE_NAMES[piece_type]}: missing, run with --generate", file=out)
+            failures += 1
+            continue
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little').astype(bool)
+        wrong = int((legal & (bits != won)).sum())
+        print(f"{TABLE_NAMES[piece_type]}: {int(legal.sum()) - wrong}/{int(legal.sum())} positions match "
+              f"the recomputed table ({time.perf_counter() - start:.1f}s)", file=out)
+        failures += wrong
+    return failures
+
+
+def verify(samples, depth, seed=0, out=sys.stdout):
+    """Check random positions of every table against a brute-force search, returns the mismatches.
+
+    The search knows nothing of the bitbase, so only positions it settles
+    within depth plies are compared, samples of them per table: mates,
+    stalemates and the lone king taking the piece. Random positions are
+    drawn until that many are settled or MAX_TRIES per sample were tried.
+    """
+    rng = random.Random(seed)
+    failures = 0
+    for piece_type in (QUEEN, ROOK, PAWN):
+        if _table(piece_type) is None:
+            print(f"{TABLE_NAMES[piece_type]}: missing, run with --generate", file=out)
+            failures += 1
+            continue
+        memo = {}
+        tried = settled = wrong = 0
+        while settled < samples and tried < samples * MAX_TRIES:
+            pos = _random_position(piece_type, rng)
+            tried += 1
+            expected = _solve(pos, depth, memo)
+            if expected is None:
+                continue
+            settled += 1
+            if probe(pos) != expected:
+                wrong += 1
+                print(f"  {pos.to_fen()}: bitbase {probe(pos)}, search {expected}", file=out)
+        print(f"{TABLE_NAMES[piece_type]}: {settled - wrong}/{settled} ok "
+              f"({tried} positions tried, the rest not settled within {depth} plies)", file=out)
+        failures += wrong
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KPK/KRK/KQK endgame bitbases")
+    parser.add_argument('--generate', action='store_true', help="rebuild the tables by retrograde analysis")
+    parser.add_argument('--verify', action='store_true', help="check the tables against brute-force search")
+    parser.add_argument('--samples', type=int, default=200, help="settled positions to verify per table")
+    parser.add_argument('-d', '--depth', type=int, default=2, help="brute-force search depth in plies")
+    parser.add_argument('--full', action='store_true',
+                        help="with --verify, also recompute every table independently and compare all positions")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        generate_all()
+    if args.verify or not args.generate:
+        failures = verify(args.samples, args.depth)
+        if args.full:
+            failures += verify_full()
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
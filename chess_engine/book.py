@@ -0,0 +1,213 @@
+"""Polyglot opening book.
+
+A Polyglot .bin book is a sorted array of 16-byte big-endian entries
+(position key, move, weight, learn). The file is memory-mapped and searched
+by binary search on the key, so opening a book of any size costs nothing and
+a lookup touches only a few pages of it.
+
+    python -m chess_engine.book books/openings.bin
+    python -m chess_engine.book books/openings.bin --fen "<fen>"
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+
+from chess_rules.attack_tables import PAWN_ATTACKS
+from chess_rules.move import move_name
+from chess_rules.movegen import generate_legal_moves
+from chess_rules.position import (START_FEN, Position, PAWN, KING, WHITE_INDEX, NO_SQUARE,
+                                  WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
+from .polyglot_keys import POLYGLOT_KEYS
+
+ENTRY = struct.Struct('>QHHI')  # key, move, weight, learn
+
+_CASTLING_OFFSET = 768
+_EP_OFFSET = 772
+_TURN_KEY = POLYGLOT_KEYS[780]
+_CASTLING_RIGHTS = (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
+
+# Polyglot writes castling as the king taking its own rook
+_CASTLING_MOVES = {(4, 7): 6, (4, 0): 2, (60, 63): 62, (60, 56): 58}
+
+# Well-known lines in coordinate notation, the longest one a game follows names it
+OPENING_NAMES = {
+    "e2e4": "King's Pawn Opening",
+    "e2e4 e7e5": "Open Game",
+    "e2e4 e7e5 g1f3 b8c6 f1b5": "Ruy Lopez",
+    "e2e4 e7e5 g1f3 b8c6 f1c4": "Italian Game",
+    "e2e4 e7e5 g1f3 b8c6 f1c4 f8c5": "Giuoco Piano",
+    "e2e4 e7e5 g1f3 b8c6 f1c4 g8f6": "Two Knights Defense",
+    "e2e4 e7e5 g1f3 b8c6 d2d4": "Scotch Game",
+    "e2e4 e7e5 g1f3 b8c6 b1c3 g8f6": "Four Knights Game",
+    "e2e4 e7e5 g1f3 g8f6": "Petrov's Defense",
+    "e2e4 e7e5 g1f3 d7d6": "Philidor Defense",
+    "e2e4 e7e5 f2f4": "King's Gambit",
+    "e2e4 e7e5 b1c3": "Vienna Game",
+    "e2e4 c7c5": "Sicilian Defense",
+    "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 a7a6": "Sicilian Defense: Najdorf Variation",
+    "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 g7g6": "Sicilian Defense: Dragon Variation",
+    "e2e4 e7e6": "French Defense",
+    "e2e4 c7c6": "Caro-Kann Defense",
+    "e2e4 d7d5": "Scandinavian Defense",
+    "e2e4 g8f6": "Alekhine's Defense",
+    "e2e4 d7d6": "Pirc Defense",
+    "d2d4": "Queen's Pawn Opening",
+    "d2d4 d7d5 c2c4": "Queen's Gambit",
+    "d2d4 d7d5 c2c4 d5c4": "Queen's Gambit Accepted",
+    "d2d4 d7d5 c2c4 e7e6": "Queen's Gambit Declined",
+    "d2d4 d7d5 c2c4 c7c6": "Slav Defense",
+    "d2d4 g8f6 c2c4": "Indian Defense",
+    "d2d4 g8f6 c2c4 g7g6 b1c3 f8g7": "King's Indian Defense",
+    "d2d4 g8f6 c2c4 g7g6 b1c3 d7d5": "Grunfeld Defense",
+    "d2d4 g8f6 c2c4 e7e6 b1c3 f8b4": "Nimzo-Indian Defense",
+    "d2d4 f7f5": "Dutch Defense",
+    "c2c4": "English Opening",
+    "g1f3": "Reti Opening",
+}
+
+
+def polyglot_key(pos):
+    """Polyglot hash of pos, the key book entries are sorted by"""
+    key = 0
+    for square, code in enumerate(pos.squares):
+        if code >= 0:
+            color, piece_type = divmod(code, 6)
+            # Polyglot piece kinds alternate black, white: black pawn 0, white pawn 1, ...
+            kind = piece_type * 2 + (color == WHITE_INDEX)
+            key ^= POLYGLOT_KEYS[kind * 64 + square]
+
+    for index, right in enumerate(_CASTLING_RIGHTS):
+        if pos.castling & right:
+            key ^= POLYGLOT_KEYS[_CASTLING_OFFSET + index]
+
+    # the en passant file only counts when a pawn of the side to move can take
+    ep = pos.ep_square
+    if ep != NO_SQUARE and PAWN_ATTACKS[pos.side ^ 1][ep] & pos.pieces[pos.side][PAWN]:
+        key ^= POLYGLOT_KEYS[_EP_OFFSET + (ep & 7)]
+
+    if pos.side == WHITE_INDEX:
+        key ^= _TURN_KEY
+    return key
+
+
+def decode_move(pos, book_move):
+    # Polyglot move bits -> encoded move: to square 0-5, from square 6-11, promotion 12-14
+    to_square = book_move & 63
+    from_square = book_move >> 6 & 63
+    promotion = book_move >> 12 & 7
+    if pos.squares[from_square] % 6 == KING:
+        to_square = _CASTLING_MOVES.get((from_square, to_square), to_square)
+    return from_square | to_square << 6 | promotion << 12
+
+
+def game_ply(pos):
+    # Plies played since the start of the game, from the move counters
+    return (pos.fullmove_number - 1) * 2 + pos.side
+
+
+class OpeningBook:
+    """Memory-mapped Polyglot book.
+
+    max_ply stops using the book once the game is that many plies old
+    (None: as long as the book has moves).
+    """
+
+    def __init__(self, path, max_ply=None):
+        self.path = path
+        self.max_ply = max_ply
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self.entries = size // ENTRY.size
+        # an empty file cannot be mapped
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.entries else b''
+
+    def close(self):
+        if self.entries:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _first_index(self, key):
+        # Index of the first entry whose key is not below key (lower bound)
+        low, high = 0, self.entries
+        data = self._map
+        while low < high:
+            middle = (low + high) // 2
+            if ENTRY.unpack_from(data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def moves(self, pos):
+        """[(move, weight)] the book has for pos, legal moves only"""
+        if self.max_ply is not None and game_ply(pos) >= self.max_ply:
+            return []
+        key = polyglot_key(pos)
+        legal = None
+        found = []
+        for index in range(self._first_index(key), self.entries):
+            entry_key, book_move, weight, _ = ENTRY.unpack_from(self._map, index * ENTRY.size)
+            if entry_key != key:
+                break
+            if legal is None:
+                legal = set(generate_legal_moves(pos))
+            move = decode_move(pos, book_move)
+            if move in legal:
+                found.append((move, weight))
+        return found
+
+    def choose(self, pos, rng=random):
+        """A book move for pos picked at random in proportion to its weight, or None"""
+        moves = [(move, weight) for move, weight in self.moves(pos) if weight]
+        if not moves:
+            return None
+        return rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+
+def open_book(path, max_ply=None):
+    # OpeningBook at path, or None when there is no usable book file
+    try:
+        return OpeningBook(path, max_ply)
+    except OSError:
+        return None
+
+
+def opening_name(pos):
+    """Name of the opening the game played into pos follows, or 'Unknown'"""
+    played = ' '.join(move_name(record[0]) for record in pos.history)
+    best = ''
+    for line in OPENING_NAMES:
+        if len(line) > len(best) and (played == line or played.startswith(line + ' ')):
+            best = line
+    return OPENING_NAMES.get(best, 'Unknown')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List the moves a Polyglot opening book has for a position")
+    parser.add_argument('book', help="Polyglot .bin file")
+    parser.add_argument('--fen', default=START_FEN, help="position to look up (default: start position)")
+    args = parser.parse_args(argv)
+
+    pos = Position.from_fen(args.fen)
+    with OpeningBook(args.book) as book:
+        moves = book.moves(pos)
+        print(f"Key: {polyglot_key(pos):016x} ({book.entries} entries in book)")
+    total = sum(weight for _, weight in moves)
+    for move, weight in sorted(moves, key=lambda item: item[1], reverse=True):
+        print(f"{move_name(move):<6} weight {weight:>6}  {weight / max(total, 1):.1%}")
+    if not moves:
+        print("Position not in book")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
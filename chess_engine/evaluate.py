@@ -0,0 +1,25 @@
+"""Static evaluation: material and piece-square tables, tapered by game phase.
+
+Scores are centipawns from the side to move's point of view. Middlegame and
+endgame values are blended by how much non-pawn material is left.
+
+The tables are in chess_rules.psqt and Position keeps their totals up to
+date in make/unmake, so evaluating a leaf is a few arithmetic operations.
+"""
+from chess_rules.position import WHITE_INDEX
+from chess_rules.psqt import MAX_PHASE
+
+
+def evaluate(pos):
+    """Score of pos in centipawns for the side to move"""
+    phase = min(pos.phase, MAX_PHASE)
+    score = (pos.mg * phase + pos.eg * (MAX_PHASE - phase)) // MAX_PHASE
+    return score if pos.side == WHITE_INDEX else -score
+
+
+def evaluate_full(pos):
+    """evaluate() recomputed from the pieces, to check the incremental totals against"""
+    mg, eg, phase = pos.compute_scores()
+    phase = min(phase, MAX_PHASE)
+    score = (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+    return score if pos.side == WHITE_INDEX else -score
@@ -0,0 +1,119 @@
+"""Move ordering for the alpha-beta search.
+
+Moves come out in stages, best guesses first:
+
+1. the hash move from the transposition table
+2. captures and promotions, by MVV-LVA (most valuable victim, least valuable attacker)
+3. the two killer moves of the ply, quiet moves that caused a cutoff in a sibling
+4. the other quiet moves, by butterfly history (from/to cutoff statistics)
+5. captures that lose material by static exchange evaluation
+
+Each stage is only scored and sorted when the search gets to it, so a
+cutoff on the hash move or a good capture costs no sorting at all.
+"""
+from chess_rules.position import EMPTY, PAWN
+from .see import see, SEE_VALUES
+
+MAX_KILLER_PLY = 128
+
+# MVV_LVA[victim type][attacker type]: bigger victims first, then cheaper attackers
+MVV_LVA = tuple(tuple((victim + 1) * 8 - attacker for attacker in range(6)) for victim in range(6))
+PROMOTION_BONUS = 6 * 8  # promotions sort ahead of captures of the same victim
+
+
+class MoveOrdering:
+    """Killer and history tables that live across the nodes of one search"""
+
+    def __init__(self):
+        self.killers = [[0, 0] for _ in range(MAX_KILLER_PLY)]
+        self.history = [[0] * 4096, [0] * 4096]  # [color][from | to << 6]
+
+    def new_search(self):
+        # Killers are tied to the old tree, history just fades
+        for slots in self.killers:
+            slots[0] = slots[1] = 0
+        for table in self.history:
+            for index, value in enumerate(table):
+                if value:
+                    table[index] = value >> 2
+
+    def record_cutoff(self, pos, move, depth, ply):
+        """Remember a quiet move that failed high"""
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[pos.side][move & 4095] += depth * depth
+
+    def moves(self, pos, moves, hash_move, ply):
+        """Yield moves (a legal move list for pos) in ordering stages"""
+        if hash_move and hash_move in moves:
+            yield hash_move
+
+        captures, quiets = _split_captures(pos, moves, hash_move)
+        losing = []
+        if captures:
+            captures.sort(reverse=True)
+            squares = pos.squares
+            for _, move in captures:
+                # only a capture by a more valuable piece can lose material
+                victim = squares[move >> 6 & 63]
+                if victim != EMPTY and not move >> 12 \
+                        and SEE_VALUES[squares[move & 63] % 6] > SEE_VALUES[victim % 6] and see(pos, move) < 0:
+                    losing.append(move)
+                    continue
+                yield move
+
+        if quiets:
+            killers = self.killers[ply] if ply < MAX_KILLER_PLY else (0, 0)
+            for killer in killers:
+                if killer and killer != hash_move and killer in quiets:
+                    quiets.remove(killer)
+                    yield killer
+
+            history = self.history[pos.side]
+            quiets.sort(key=lambda move: history[move & 4095], reverse=True)
+            yield from quiets
+
+        yield from losing
+
+
+def _split_captures(pos, moves, skip=0):
+    # ([(MVV-LVA score, move)] for captures and promotions, [quiet moves])
+    squares = pos.squares
+    ep_square = pos.ep_square
+    captures = []
+    quiets = []
+    for move in moves:
+        if move == skip:
+            continue
+        to_square = move >> 6 & 63
+        victim = squares[to_square]
+        if victim != EMPTY:
+            score = MVV_LVA[victim % 6][squares[move & 63] % 6]
+        elif to_square == ep_square and squares[move & 63] % 6 == PAWN:
+            score = MVV_LVA[PAWN][PAWN]
+        elif move >> 12:
+            score = 0
+        else:
+            quiets.append(move)
+            continue
+        if move >> 12:
+            score += PROMOTION_BONUS + (move >> 12)
+        captures.append((score, move))
+    return captures, quiets
+
+
+def capture_moves(pos, moves):
+    """Captures and promotions among moves, best MVV-LVA first, for quiescence"""
+    captures, _ = _split_captures(pos, moves)
+    captures.sort(reverse=True)
+    return [move for _, move in captures]
+
+
+def is_quiet(pos, move):
+    # Not a capture, en passant or promotion
+    to_square = move >> 6 & 63
+    if pos.squares[to_square] != EMPTY or move >> 12:
+        return False
+    return not (to_square == pos.ep_square and pos.squares[move & 63] % 6 == PAWN)
@@ -0,0 +1,316 @@
+"""Negamax alpha-beta search with iterative deepening.
+
+The search plays moves on the Position it is given and takes them back, so
+the position is unchanged when search() returns, even after a timeout.
+"""
+import time
+
+from chess_rules.position import EMPTY, PAWN, KING, WHITE_INDEX, lsb, popcount
+from chess_rules.movegen import generate_legal_moves, is_in_check
+from chess_rules.result import has_insufficient_material
+from .bitbase import probe as probe_bitbase, WIN, DRAW, LOSS
+from .evaluate import evaluate
+from .ordering import MoveOrdering, is_quiet, capture_moves
+from .see import see, SEE_VALUES
+from .tt import TranspositionTable, BOUND_EXACT, BOUND_LOWER, BOUND_UPPER
+
+INFINITY = 1_000_000
+MATE_SCORE = 100_000
+MAX_PLY = 64
+MATE_BOUND = MATE_SCORE - MAX_PLY  # scores beyond this are forced mates
+KNOWN_WIN = 20_000  # bitbase wins, below every mate score
+
+CHECK_EVERY = 1024  # nodes between clock checks, must be a power of two
+DELTA_MARGIN = 200  # slack for positional gains when delta pruning captures
+
+
+class SearchTimeout(Exception):
+    # Unwinds the tree when the time budget is used up
+    pass
+
+
+class SearchResult:
+    """Best move found and how much work went into it"""
+
+    __slots__ = ('move', 'score', 'depth', 'nodes', 'time', 'tt_hit_rate', 'hashfull')
+
+    def __init__(self, move, score, depth, nodes, elapsed, tt_hit_rate=0.0, hashfull=0):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.time = elapsed
+        self.tt_hit_rate = tt_hit_rate
+        self.hashfull = hashfull  # permille of the table used by this search
+
+    @property
+    def nps(self):
+        return int(self.nodes / self.time) if self.time > 0 else 0
+
+    def __repr__(self):
+        return (f"SearchResult(move={self.move}, score={self.score}, depth={self.depth}, "
+                f"nodes={self.nodes}, nps={self.nps}, tt_hit_rate={self.tt_hit_rate:.2f}, "
+                f"hashfull={self.hashfull})")
+
+
+def allocate_time(remaining, moves_to_go=30):
+    """Seconds to think about one move with `remaining` seconds on the clock"""
+    budget = remaining / moves_to_go
+    # never risk more than a quarter of the clock on one move
+    return max(0.05, min(budget, remaining * 0.25))
+
+
+def is_mate_score(score):
+    return abs(score) >= MATE_BOUND
+
+
+def _score_to_tt(score, ply):
+    # Mate scores are stored as distance from the node, not from the root
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+# Squares from the center, 0 on d4/e4/d5/e5 up to 6 in the corners
+_CENTER_DISTANCE = tuple(max(3 - (sq & 7), (sq & 7) - 4) + max(3 - (sq >> 3), (sq >> 3) - 4)
+                         for sq in range(64))
+
+
+def _bitbase_score(pos, ply):
+    # Score of a KPK/KRK/KQK position from the bitbase, or None when it is not
+    # one. Wins get a progress bonus so the search knows which way to push:
+    # the pawn up the board, or the lone king to the edge with the kings close
+    result = probe_bitbase(pos)
+    if result is None:
+        return None
+    if result == DRAW:
+        return 0
+    if result == LOSS and is_in_check(pos, pos.side):
+        return None  # may be checkmate, which the search scores itself
+
+    strong = pos.side if result == WIN else pos.side ^ 1
+    strong_king = lsb(pos.pieces[strong][KING])
+    weak_king = lsb(pos.pieces[strong ^ 1][KING])
+    pawns = pos.pieces[strong][PAWN]
+    if pawns:
+        rank = lsb(pawns) >> 3
+        progress = 20 * (rank if strong == WHITE_INDEX else 7 - rank)
+    else:
+        king_distance = abs((strong_king & 7) - (weak_king & 7)) + abs((strong_king >> 3) - (weak_king >> 3))
+        progress = 20 * _CENTER_DISTANCE[weak_king] + 5 * (14 - king_distance)
+    score = KNOWN_WIN + progress - ply
+    return score if result == WIN else -score
+
+
+class Searcher:
+    def __init__(self, hash_mb=16, tt=None):
+        self.nodes = 0
+        self.deadline = None
+        self.should_stop = None  # optional callable, polled with the clock
+        self.bitbase_cutoff = True  # end the tree at bitbase endings, off when the root is one
+        self.tt = tt if tt is not None else TranspositionTable(hash_mb)
+        self.ordering = MoveOrdering()
+
+    def search(self, pos, time_limit=None, max_depth=MAX_PLY, info=None, helper=0, generation=None):
+        """Best move for the side to move in pos.
+
+        Deepens one ply at a time until max_depth, until time_limit seconds
+        are used up or until should_stop() returns True. info, if given, is
+        called with a SearchResult after every completed depth. Returns a
+        SearchResult whose move is None when there are no legal moves.
+
+        helper > 0 makes this one of several searchers sharing a table (lazy
+        SMP): odd helpers search one ply deeper, root moves are tried in a
+        rotated order, and the search runs until stopped instead of saving
+        time. generation is the table generation all sharers agree on.
+        """
+        start = time.perf_counter()
+        self.nodes = 0
+        self.deadline = start + time_limit if time_limit is not None else None
+        self.tt.new_search(generation)
+        self.tt.reset_stats()
+        self.ordering.new_search()
+        history_length = len(pos.history)
+        # inside a bitbase ending the tree still has to find the way to the win,
+        # so the bitbase only scores the leaves
+        self.bitbase_cutoff = popcount(pos.occupied) > 3
+
+        moves = generate_legal_moves(pos)
+        entry = self.tt.probe(pos.hash)
+        moves = list(self.ordering.moves(pos, moves, entry[3] if entry else 0, 0))
+        if not moves:
+            score = -MATE_SCORE if is_in_check(pos, pos.side) else 0
+            return SearchResult(None, score, 0, 0, 0.0)
+
+        if helper:
+            # a different first move per helper spreads the work over the tree
+            shift = helper % len(moves)
+            moves = moves[shift:] + moves[:shift]
+
+        result = SearchResult(moves[0], 0, 0, 0, 0.0)
+        for depth in range(1 + helper % 2, max_depth + 1):
+            try:
+                score, best_move = self._root(pos, moves, depth)
+            except SearchTimeout:
+                # back out of the unfinished tree, keep the last full iteration
+                while len(pos.history) > history_length:
+                    pos.unmake_move()
+                break
+
+            elapsed = time.perf_counter() - start
+            result = SearchResult(best_move, score, depth, self.nodes, elapsed, self.tt.hit_rate)
+            if info is not None:
+                info(result)
+
+            # best move first next time round
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+            if len(moves) == 1 or is_mate_score(score):
+                break
+            # the next depth takes several times longer, do not start what cannot finish
+            if not helper and time_limit is not None and elapsed > time_limit * 0.5:
+                break
+
+        result.nodes = self.nodes
+        result.time = time.perf_counter() - start
+        result.tt_hit_rate = self.tt.hit_rate
+        result.hashfull = self.tt.hashfull()
+        return result
+
+    def _out_of_time(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            return True
+        return self.should_stop is not None and self.should_stop()
+
+    def _root(self, pos, moves, depth):
+        alpha = -INFINITY
+        best_move = moves[0]
+        for move in moves:
+            pos.make_move(move)
+            score = -self._negamax(pos, depth - 1, -INFINITY, -alpha, 1)
+            pos.unmake_move()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        self.tt.store(pos.hash, depth, BOUND_EXACT, _score_to_tt(alpha, 0), best_move)
+        return alpha, best_move
+
+    def _negamax(self, pos, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & (CHECK_EVERY - 1) and self._out_of_time():
+            raise SearchTimeout
+
+        if pos.halfmove_clock >= 100 or has_insufficient_material(pos) or pos.repetition_count() > 1:
+            return 0
+
+        if self.bitbase_cutoff and popcount(pos.occupied) <= 3:
+            score = _bitbase_score(pos, ply)
+            if score is not None:
+                return score
+
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiesce(pos, alpha, beta, ply)
+
+        # a result from an earlier visit may settle this node outright
+        key = pos.hash
+        entry = self.tt.probe(key)
+        hash_move = 0
+        if entry is not None:
+            entry_depth, bound, score, hash_move = entry
+            if entry_depth >= depth:
+                score = _score_from_tt(score, ply)
+                if bound == BOUND_EXACT or (bound == BOUND_LOWER and score >= beta) \
+                        or (bound == BOUND_UPPER and score <= alpha):
+                    return score
+
+        moves = generate_legal_moves(pos)
+        if not moves:
+            # checkmate scores prefer the quickest mate
+            return -MATE_SCORE + ply if is_in_check(pos, pos.side) else 0
+
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = 0
+        for move in self.ordering.moves(pos, moves, hash_move, ply):
+            pos.make_move(move)
+            score = -self._negamax(pos, depth - 1, -beta, -alpha, ply + 1)
+            pos.unmake_move()
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if is_quiet(pos, move):
+                            self.ordering.record_cutoff(pos, move, depth, ply)
+                        break
+
+        if best >= beta:
+            bound = BOUND_LOWER
+        elif best > original_alpha:
+            bound = BOUND_EXACT
+        else:
+            bound = BOUND_UPPER
+        self.tt.store(key, depth, bound, _score_to_tt(best, ply), best_move)
+        return best
+
+    def _quiesce(self, pos, alpha, beta, ply):
+        # Captures and promotions only, until the position is quiet
+        self.nodes += 1
+        if not self.nodes & (CHECK_EVERY - 1) and self._out_of_time():
+            raise SearchTimeout
+
+        moves = generate_legal_moves(pos)
+        in_check = is_in_check(pos, pos.side)
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+
+        if in_check:
+            # no standing pat in check, every evasion is searched
+            best = -INFINITY
+            candidates = moves
+        else:
+            best = _bitbase_score(pos, ply) if popcount(pos.occupied) <= 3 else None
+            if best is None:
+                best = evaluate(pos)
+            if best >= beta or ply >= MAX_PLY:
+                return best
+            if best > alpha:
+                alpha = best
+            candidates = capture_moves(pos, moves)
+        stand_pat = best
+
+        squares = pos.squares
+        for move in candidates:
+            if not in_check:
+                victim = squares[move >> 6 & 63]
+                gain = SEE_VALUES[victim % 6] if victim != EMPTY else SEE_VALUES[PAWN]
+                if move >> 12:
+                    gain += SEE_VALUES[move >> 12] - SEE_VALUES[PAWN]
+                # delta pruning: even winning the piece outright leaves us below alpha
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+                # SEE pruning: the exchange on the square loses material
+                if see(pos, move) < 0:
+                    continue
+            pos.make_move(move)
+            score = -self._quiesce(pos, -beta, -alpha, ply + 1)
+            pos.unmake_move()
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
@@ -0,0 +1,101 @@
+"""Static exchange evaluation.
+
+Plays out the captures on one square, each side always recapturing with
+its least valuable attacker and free to stop when going on would lose
+material, and returns the material balance. Sliders behind the capturing
+pieces (x-rays) join in as the square's attackers are taken off the board.
+Pins are ignored.
+
+Needs only a Position, so the UI can use it to flag hanging pieces as well
+as the search to skip losing captures.
+"""
+from chess_rules.position import EMPTY, PAWN, KING, iter_bits
+from chess_rules.movegen import attackers_to
+
+# Exchange values per piece type; the king is worth more than anything it can win
+SEE_VALUES = (100, 320, 330, 500, 900, 20000)
+
+
+def _least_valuable(pos, attackers, color):
+    # (piece type, square bit) of color's cheapest piece among attackers
+    pieces = pos.pieces[color]
+    for piece_type in range(6):
+        bb = attackers & pieces[piece_type]
+        if bb:
+            return piece_type, bb & -bb
+    return None, 0
+
+
+def _exchange(pos, square, from_bit, attacker_type, captured_value, color, occupied):
+    # Swap list for the capture sequence started by color's piece on from_bit
+    gains = [captured_value]
+    on_square = SEE_VALUES[attacker_type]
+    occupied ^= from_bit
+    side = color ^ 1
+    while True:
+        attackers = attackers_to(pos, square, side, occupied)
+        if not attackers:
+            break
+        piece_type, bit = _least_valuable(pos, attackers, side)
+        if piece_type == KING and attackers_to(pos, square, side ^ 1, occupied ^ bit):
+            break  # the king cannot take a defended piece
+        gains.append(on_square - gains[-1])
+        occupied ^= bit
+        on_square = SEE_VALUES[piece_type]
+        side ^= 1
+
+    # each side only continues the exchange if it pays
+    for index in range(len(gains) - 1, 0, -1):
+        gains[index - 1] = -max(-gains[index - 1], gains[index])
+    return gains[0]
+
+
+def see(pos, move):
+    """Material the side to move wins (negative: loses) by playing capture move"""
+    from_square = move & 63
+    to_square = move >> 6 & 63
+    squares = pos.squares
+    attacker_type = squares[from_square] % 6
+    color = squares[from_square] // 6
+    occupied = pos.occupied
+
+    victim = squares[to_square]
+    if victim != EMPTY:
+        captured_value = SEE_VALUES[victim % 6]
+    elif attacker_type == PAWN and to_square == pos.ep_square:
+        captured_value = SEE_VALUES[PAWN]
+        occupied ^= 1 << (to_square - 8 if color == 0 else to_square + 8)
+    else:
+        captured_value = 0
+
+    promotion = move >> 12
+    if promotion:
+        # the pawn turns into the promoted piece before it can be taken back
+        captured_value += SEE_VALUES[promotion] - SEE_VALUES[PAWN]
+        attacker_type = promotion
+    return _exchange(pos, to_square, 1 << from_square, attacker_type, captured_value, color, occupied)
+
+
+def see_square(pos, square, by_color):
+    """What by_color wins by starting the exchange on square with its cheapest attacker"""
+    code = pos.squares[square]
+    if code == EMPTY:
+        return 0
+    attackers = attackers_to(pos, square, by_color)
+    if not attackers:
+        return 0
+    attacker_type, bit = _least_valuable(pos, attackers, by_color)
+    if attacker_type == KING and attackers_to(pos, square, by_color ^ 1, pos.occupied ^ bit):
+        return 0
+    return _exchange(pos, square, bit, attacker_type, SEE_VALUES[code % 6], by_color, pos.occupied)
+
+
+def hanging_pieces(pos, color):
+    """Squares of color's pieces (king aside) that the opponent can win material on"""
+    hanging = []
+    pieces = pos.pieces[color]
+    for piece_type in range(KING):
+        for square in iter_bits(pieces[piece_type]):
+            if see_square(pos, square, color ^ 1) > 0:
+                hanging.append(square)
+    return hanging
@@ -0,0 +1,118 @@
+"""Transposition table in preallocated flat arrays.
+
+Entries live in one byte buffer split into typed columns, so the table
+never allocates per entry and its memory use is fixed by the MB cap. Each
+bucket has two slots: the first keeps the deepest result (depth-preferred),
+the second always takes the newest one (always-replace).
+
+The stored key is the position key XORed with the entry's data, so an entry
+torn by two processes writing at once (a table in shared memory) fails the
+key check instead of returning mixed data.
+"""
+BOUND_EXACT, BOUND_LOWER, BOUND_UPPER = 1, 2, 3
+
+ENTRY_BYTES = 16  # key 8, score 4, move 2, depth/bound/generation 2
+BUCKET_SLOTS = 2
+
+# info column: bound in bits 0-1, depth in bits 2-8, generation in bits 9-15
+_DEPTH_SHIFT = 2
+_GENERATION_SHIFT = 9
+_GENERATION_MASK = 127
+
+
+def table_bytes(size_mb):
+    # Bytes used by a table of size_mb, rounded down to whole buckets
+    buckets = max(1, size_mb * 1024 * 1024 // (ENTRY_BYTES * BUCKET_SLOTS))
+    return buckets * ENTRY_BYTES * BUCKET_SLOTS
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16, buffer=None):
+        """Table capped at size_mb megabytes.
+
+        buffer, if given, is a writable buffer of table_bytes(size_mb) bytes to
+        keep the entries in instead of a private bytearray.
+        """
+        self.size_mb = size_mb
+        size = table_bytes(size_mb)
+        if buffer is None:
+            buffer = bytearray(size)
+        elif len(buffer) < size:
+            raise ValueError(f"Buffer of {len(buffer)} bytes is too small for a {size_mb} MB table")
+        self.buffer = buffer
+
+        self.slots = size // ENTRY_BYTES
+        self.buckets = self.slots // BUCKET_SLOTS
+        view = self._view = memoryview(buffer)
+        slots = self.slots
+        self.keys = view[:8 * slots].cast('Q')
+        self.scores = view[8 * slots:12 * slots].cast('i')
+        self.moves = view[12 * slots:14 * slots].cast('H')
+        self.info = view[14 * slots:16 * slots].cast('H')
+
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def release(self):
+        # Let go of the buffer, needed before closing a shared memory block
+        for column in (self.keys, self.scores, self.moves, self.info, self._view):
+            column.release()
+
+    def _data(self, slot):
+        # Everything but the key packed in 64 bits, for the XOR check
+        return self.scores[slot] & 0xFFFFFFFF | self.moves[slot] << 32 | self.info[slot] << 48
+
+    def clear(self):
+        self.info[:] = bytes(2 * self.slots)  # info 0 marks an empty slot
+        self.generation = 0
+        self.reset_stats()
+
+    def new_search(self, generation=None):
+        # Older entries lose their claim on the depth-preferred slots; processes
+        # sharing a table pass the same generation so they agree on what is old
+        if generation is None:
+            generation = self.generation + 1
+        self.generation = generation & _GENERATION_MASK
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key):
+        """(depth, bound, score, move) stored for key, or None"""
+        self.probes += 1
+        slot = key % self.buckets * BUCKET_SLOTS
+        keys = self.keys
+        if keys[slot] ^ self._data(slot) != key or not self.info[slot]:
+            slot += 1
+            if keys[slot] ^ self._data(slot) != key or not self.info[slot]:
+                return None
+        self.hits += 1
+        info = self.info[slot]
+        return info >> _DEPTH_SHIFT & 127, info & 3, self.scores[slot], self.moves[slot]
+
+    def store(self, key, depth, bound, score, move):
+        slot = key % self.buckets * BUCKET_SLOTS
+        info = self.info[slot]
+        # depth-preferred slot: same position, empty, stale, or not deeper than this result
+        if info and self.keys[slot] ^ self._data(slot) != key and info >> _GENERATION_SHIFT == self.generation \
+                and info >> _DEPTH_SHIFT & 127 > depth:
+            slot += 1  # always-replace slot
+        info = self.generation << _GENERATION_SHIFT | max(0, min(depth, 127)) << _DEPTH_SHIFT | bound
+        self.scores[slot] = score
+        self.moves[slot] = move
+        self.info[slot] = info
+        self.keys[slot] = key ^ (score & 0xFFFFFFFF | move << 32 | info << 48)
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def hashfull(self):
+        # Permille of the first 1000 slots used in the current search, as UCI engines report
+        sample = min(1000, self.slots)
+        used = sum(1 for slot in range(sample)
+                   if self.info[slot] and self.info[slot] >> _GENERATION_SHIFT == self.generation)
+        return used * 1000 // sample
+
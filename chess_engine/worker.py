@@ -0,0 +1,165 @@
+"""Engine search in separate processes.
+
+The game sends a position over a pipe and polls for the best move, so its
+loop keeps drawing and running the clocks while the engine thinks.
+
+With threads > 1 the search is a lazy SMP: every worker searches the same
+root, helpers with varied depths and move orders, and they share one
+transposition table in shared memory. The main worker's move is played;
+the helpers only make the table richer for it.
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+
+from chess_rules.position import Position
+from .search import Searcher
+from .tt import TranspositionTable, table_bytes
+
+
+def game_record(pos):
+    # Snapshot of the starting position and the moves played since, so the
+    # worker can rebuild the history that repetition detection needs
+    moves = [record[0] for record in pos.history]
+    start = pos.copy()
+    start.history = list(pos.history)
+    for _ in moves:
+        start.unmake_move()
+    return start.to_bytes(), moves
+
+
+def _worker_main(conn, cancelled, shm_name, hash_mb, helper):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    tt = TranspositionTable(hash_mb, buffer=shm.buf)
+    searcher = Searcher(tt=tt)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        search_id, snapshot, moves, time_limit = message
+        if cancelled.value >= search_id:
+            conn.send((search_id, None))  # stopped before it started
+            continue
+        pos = Position.from_bytes(snapshot)
+        for move in moves:
+            pos.make_move(move)
+        searcher.should_stop = lambda: cancelled.value >= search_id
+        result = searcher.search(pos, time_limit, helper=helper, generation=search_id)
+        conn.send((search_id, result))
+
+    tt.release()
+    shm.close()
+    conn.close()
+
+
+class EngineWorker:
+    """Searcher running in threads child processes.
+
+    start_search() returns at once; poll() gives the SearchResult when it is
+    ready, and its nodes grow to the sum over all workers as the helpers
+    report in. stop() ends the current search early and drops its result.
+    """
+
+    def __init__(self, hash_mb=16, threads=1):
+        self.threads = max(1, threads)
+        self._shm = shared_memory.SharedMemory(create=True, size=table_bytes(hash_mb))
+        # searches with an id up to this value are cancelled
+        self._cancelled = multiprocessing.RawValue('q', 0)
+        self._conns = []
+        self._processes = []
+        for helper in range(self.threads):
+            conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker_main,
+                                              args=(child_conn, self._cancelled, self._shm.name,
+                                                    hash_mb, helper),
+                                              daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(conn)
+            self._processes.append(process)
+        self.search_id = 0
+        self.searching = False
+        self._result = None  # last finished search, still collecting helper nodes
+        self._waiting = []  # helper connections that have not reported on it yet
+
+    def start_search(self, pos, time_limit=None):
+        if self.searching:
+            self.stop()
+        # helpers still reporting on the last search are not waited for
+        self._collect_helpers()
+        self._waiting = []
+        self.search_id += 1
+        snapshot, moves = game_record(pos)
+        for conn in self._conns:
+            conn.send((self.search_id, snapshot, moves, time_limit))
+        self.searching = True
+
+    def _receive(self, conn, timeout=0):
+        # (True, result) once a worker answered the current search, skipping stale answers;
+        # the result is None when the search was stopped before the worker started it
+        while conn.poll(timeout):
+            search_id, result = conn.recv()
+            if search_id == self.search_id:
+                return True, result
+        return False, None
+
+    def _collect_helpers(self, timeout=0):
+        # Add the nodes of helpers that have answered to the last result
+        waiting = []
+        for conn in self._waiting:
+            answered, helper_result = self._receive(conn, timeout)
+            if not answered:
+                waiting.append(conn)
+            elif helper_result is not None:
+                self._result.nodes += helper_result.nodes
+        self._waiting = waiting
+
+    def poll(self):
+        """SearchResult of the current search once it is done, else None.
+
+        The result comes back as soon as the main worker has it. The helpers'
+        nodes are added to it as they report in, on later polls or in
+        wait_helpers().
+        """
+        if not self.searching:
+            self._collect_helpers()
+            return None
+        _, result = self._receive(self._conns[0])
+        if result is None:
+            return None
+
+        # the main worker is done, the helpers stop within a clock check
+        self._cancelled.value = self.search_id
+        self.searching = False
+        self._result = result
+        self._waiting = self._conns[1:]
+        self._collect_helpers()
+        return result
+
+    def wait_helpers(self, timeout=None):
+        """Block until every helper has reported on the last finished search, returns its result"""
+        self._collect_helpers(timeout)
+        return self._result
+
+    def stop(self):
+        self._cancelled.value = self.search_id
+        self.searching = False
+
+    def close(self):
+        self.stop()
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._shm.close()
+        self._shm.unlink()
@@ -3,15 +3,22 @@ import math
 import os
 from constants import *
 from chess_board import ChessBoard
-from chess_piece import ChessPiece
 from chess_statistics import ChessStatistics
+from renderer import DirtyRectRenderer
+from scheduler import FrameScheduler
+from fonts import get_font, render_text
+from chess_rules.position import TYPE_INDEX, TYPE_NAMES, COLOR_INDEX, square_index
+from chess_rules.move import encode_move, move_name
+from chess_rules.attack_tables import SQUARE_POSITIONS
+from chess_engine import EngineWorker, allocate_time, open_book, opening_name
 
 
 class ChessGame:
     def __init__(self):
         self.screen = pygame.display.set_mode([WIDTH, HEIGHT])
         pygame.display.set_caption('Chess Master')
-        self.clock = pygame.time.Clock()
+        self.scheduler = FrameScheduler(FPS)
+        self.events = []  # input for the current frame
         self.board = ChessBoard(self.screen)
         self.turn_step = 0  # 0-white select, 1-white move, 2-black select, 3-black move
         self.selection = 100  # stores which piece player clicked on
@@ -22,15 +29,21 @@ class ChessGame:
         self.winner = ''
         self.winner_by_time = False
         self.game_over = False
+        self.game_saved = False  # statistics of the finished game written
         self.white_promote = False
         self.black_promote = False
         self.promo_index = 100
         self.board_flipped = False  # false = white at bottom, true = black at bottom
+        self.show_hanging = False  # H key frames pieces that can be won by exchange
         self.last_flip_time = 0  # prevents accidental double-clicks on F key
 
         # player preferences
         self.player_color = WHITE
         self.computer_plays = False
+        self.engine = None  # EngineWorker, started with the first computer move
+        self.renderer = DirtyRectRenderer()  # gameplay screen, pushes only what changed
+        self.last_search = None  # SearchResult of the computer's last move
+        self.book = open_book(BOOK_PATH, BOOK_MAX_PLY)  # None without a book file
 
         # timer settings
         self.time_control = BLITZ
@@ -52,21 +65,18 @@ class ChessGame:
         self.stats = ChessStatistics()
 
         # fonts for different text sizes
-        try:
-            self.font = pygame.font.Font('freesansbold.ttf', 20)
-            self.small_font = pygame.font.Font('freesansbold.ttf', 16)
-            self.tiny_font = pygame.font.Font('freesansbold.ttf', 12)
-            self.big_font = pygame.font.Font('freesansbold.ttf', 48)
-        except:
-            self.font = pygame.font.SysFont('Arial', 20)
-            self.small_font = pygame.font.SysFont('Arial', 16)
-            self.tiny_font = pygame.font.SysFont('Arial', 12)
-            self.big_font = pygame.font.SysFont('Arial', 48)
+        self.font = get_font(20)
+        self.small_font = get_font(16)
+        self.tiny_font = get_font(12)
+        self.big_font = get_font(48)
 
     def run(self):
         game_running = True
         while game_running:
-            self.clock.tick(FPS)
+            # sleep until input or until something on screen changes by itself
+            self.events = self.scheduler.wait(self.frame_timeout())
+            if any(event.type == pygame.VIDEOEXPOSE for event in self.events):
+                self.renderer.invalidate()
 
             # animation counter
             if self.counter < 30:
@@ -75,15 +85,16 @@ class ChessGame:
                 self.counter = 0
 
             # route to different screens
+            shown_state = self.game_state
             if self.game_state == MENU:
                 game_running = self.handle_menu()
             elif self.game_state == TIME_SELECT:
                 game_running = self.handle_time_selection()
             elif self.game_state == PLAYING:
-                game_running = self.handle_gameplay()
-                # count down timers only when game is active
+                # count down timers only when game is active, before a move ends the turn
                 if not self.game_over and not self.white_promote and not self.black_promote:
                     self.update_timers()
+                game_running = self.handle_gameplay()
             elif self.game_state == self.HISTORY:
                 game_running = self.handle_history_view()
             elif self.game_state == self.CHARTS:
@@ -91,10 +102,31 @@ class ChessGame:
             elif self.game_state == CHART_VIEWER:
                 game_running = self.handle_chart_viewer()
 
-            pygame.display.flip()
+            # gameplay pushes only its changed regions, the other screens redraw in full
+            if shown_state != PLAYING:
+                pygame.display.flip()
+                self.renderer.invalidate()
 
+        if self.engine is not None:
+            self.engine.close()
+        if self.book is not None:
+            self.book.close()
         pygame.quit()
 
+    def frame_timeout(self):
+        # Milliseconds until the screen changes without input, 0 while animating, None for never
+        if self.game_state != PLAYING:
+            return None
+        # check pulse, computer thinking, flip key held down
+        if self.check or self.is_computer_turn() or pygame.key.get_pressed()[pygame.K_f]:
+            return 0
+        if self.game_over or self.white_promote or self.black_promote:
+            return None
+        # the running clock shows its next second
+        remaining = self.white_time if self.turn_step < 2 else self.black_time
+        remaining -= (pygame.time.get_ticks() - self.last_move_time) / 1000
+        return int(max(remaining, 0) % 1 * 1000) + 1
+
     def handle_menu(self):
         # get the standard menu buttons
         white_button, black_button, quit_button = self.board.draw_menu()
@@ -111,11 +143,11 @@ class ChessGame:
         pygame.draw.rect(self.screen, GOLD if history_hover else WOOD_BROWN, history_button, 3, border_radius=15)
 
         # history button text
-        history_text = self.font.render("History & Stats", True, 'white')
+        history_text = render_text(self.font, "History & Stats", 'white')
         history_text_rect = history_text.get_rect(center=history_button.center)
         self.screen.blit(history_text, history_text_rect)
 
-        for event in pygame.event.get():
+        for event in self.events:
             if event.type == pygame.QUIT:
                 return False
 
@@ -151,7 +183,7 @@ class ChessGame:
         self.screen.fill(DARK_GRAY)
 
         # header
-        header = self.big_font.render("Game History & Statistics", True, GOLD)
+        header = render_text(self.big_font, "Game History & Statistics", GOLD)
         header_rect = header.get_rect(center=(WIDTH // 2, 50))
         self.screen.blit(header, header_rect)
 
@@ -180,7 +212,7 @@ class ChessGame:
                 pygame.draw.rect(self.screen, color, tab_rect, border_radius=10)
                 text_color = 'black' if tab_hover else 'white'
 
-            tab_text = self.font.render(tab_name, True, text_color)
+            tab_text = render_text(self.font, tab_name, text_color)
             tab_text_rect = tab_text.get_rect(center=tab_rect.center)
             self.screen.blit(tab_text, tab_text_rect)
 
@@ -196,7 +228,7 @@ class ChessGame:
         self.draw_history_controls()
 
         # handle events
-        for event in pygame.event.get():
+        for event in self.events:
             if event.type == pygame.QUIT:
                 return False
 
@@ -225,7 +257,7 @@ class ChessGame:
         # get all games
         games = self.stats.get_all_games()
         if not games:
-            no_data_text = self.font.render("No games in history yet", True, CREAM_WHITE)
+            no_data_text = render_text(self.font, "No games in history yet", CREAM_WHITE)
             no_data_rect = no_data_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
             self.screen.blit(no_data_text, no_data_rect)
             return
@@ -236,7 +268,7 @@ class ChessGame:
         pygame.draw.rect(self.screen, GOLD, summary_panel, 4, border_radius=15)
 
         # title
-        title = self.font.render("Game Summary", True, CREAM_WHITE)
+        title = render_text(self.font, "Game Summary", CREAM_WHITE)
         self.screen.blit(title, (summary_panel.x + 20, summary_panel.y + 20))
 
         # get summary statistics
@@ -256,20 +288,20 @@ class ChessGame:
             ]
 
             for text in stats_text:
-                self.screen.blit(self.font.render(text, True, CREAM_WHITE),
+                self.screen.blit(render_text(self.font, text, CREAM_WHITE),
                                  (summary_panel.x + 30, summary_panel.y + y_offset))
                 y_offset += line_height
 
             # popular openings
             if summary['popular_openings']:
                 y_offset += 20
-                self.screen.blit(self.font.render("Popular Openings:", True, CREAM_WHITE),
+                self.screen.blit(render_text(self.font, "Popular Openings:", CREAM_WHITE),
                                  (summary_panel.x + 30, summary_panel.y + y_offset))
                 y_offset += line_height
 
                 for opening, count in summary['popular_openings'][:3]:
                     text = f"• {opening}: {count} games"
-                    self.screen.blit(self.small_font.render(text, True, CREAM_WHITE),
+                    self.screen.blit(render_text(self.small_font, text, CREAM_WHITE),
                                      (summary_panel.x + 50, summary_panel.y + y_offset))
                     y_offset += line_height - 5
 
@@ -279,7 +311,7 @@ class ChessGame:
         pygame.draw.rect(self.screen, GOLD, games_panel, 4, border_radius=15)
 
         # title
-        title = self.font.render("Recent Games", True, CREAM_WHITE)
+        title = render_text(self.font, "Recent Games", CREAM_WHITE)
         self.screen.blit(title, (games_panel.x + 20, games_panel.y + 20))
 
         # list of games
@@ -312,7 +344,7 @@ class ChessGame:
                 pygame.draw.rect(self.screen, LIGHT_BLUE, highlight_rect, border_radius=5)
 
             # draw text
-            self.screen.blit(self.small_font.render(game_text, True, CREAM_WHITE),
+            self.screen.blit(render_text(self.small_font, game_text, CREAM_WHITE),
                              (games_panel.x + 30, games_panel.y + y_offset))
             y_offset += 25
 
@@ -322,7 +354,7 @@ class ChessGame:
 
         if not games or self.selected_game_index < 0 or self.selected_game_index >= len(games):
             # show message to select a game
-            message = self.font.render("Select a game from the Overview tab", True, CREAM_WHITE)
+            message = render_text(self.font, "Select a game from the Overview tab", CREAM_WHITE)
             message_rect = message.get_rect(center=(WIDTH // 2, HEIGHT // 2))
             self.screen.blit(message, message_rect)
             return
@@ -335,7 +367,7 @@ class ChessGame:
         pygame.draw.rect(self.screen, GOLD, detail_panel, 4, border_radius=15)
 
         # title
-        title = self.font.render(f"Game Details - {game.get('timestamp', 'Unknown')}", True, CREAM_WHITE)
+        title = render_text(self.font, f"Game Details - {game.get('timestamp', 'Unknown')}", CREAM_WHITE)
         self.screen.blit(title, (detail_panel.x + 20, detail_panel.y + 20))
 
         # create two columns
@@ -368,7 +400,7 @@ class ChessGame:
         ]
 
         for text in left_info:
-            self.screen.blit(self.font.render(text, True, CREAM_WHITE),
+            self.screen.blit(render_text(self.font, text, CREAM_WHITE),
                              (left_x, detail_panel.y + y_offset))
             y_offset += line_height
 
@@ -385,7 +417,7 @@ class ChessGame:
         ]
 
         for text in right_info:
-            self.screen.blit(self.font.render(text, True, CREAM_WHITE),
+            self.screen.blit(render_text(self.font, text, CREAM_WHITE),
                              (right_x, detail_panel.y + y_offset))
             y_offset += line_height
 
@@ -397,7 +429,7 @@ class ChessGame:
         pygame.draw.rect(self.screen, GOLD, analysis_panel, 4, border_radius=15)
 
         # title
-        title = self.font.render("Statistical Analysis", True, CREAM_WHITE)
+        title = render_text(self.font, "Statistical Analysis", CREAM_WHITE)
         self.screen.blit(title, (analysis_panel.x + 20, analysis_panel.y + 20))
 
         # analysis options
@@ -428,8 +460,8 @@ class ChessGame:
 
             # option text
             text_color = 'black' if hover else 'white'
-            option_text = self.font.render(option, True, text_color)
-            desc_text = self.small_font.render(description, True, text_color)
+            option_text = render_text(self.font, option, text_color)
+            desc_text = render_text(self.small_font, description, text_color)
 
             self.screen.blit(option_text, (option_rect.x + 20, option_rect.y + 10))
             self.screen.blit(desc_text, (option_rect.x + 20, option_rect.y + 28))
@@ -443,7 +475,7 @@ class ChessGame:
         pygame.draw.rect(self.screen, color, generate_btn, border_radius=10)
         pygame.draw.rect(self.screen, GOLD, generate_btn, 3, border_radius=10)
 
-        gen_text = self.font.render("Generate All Charts & Export Data", True, 'white')
+        gen_text = render_text(self.font, "Generate All Charts & Export Data", 'white')
         gen_text_rect = gen_text.get_rect(center=generate_btn.center)
         self.screen.blit(gen_text, gen_text_rect)
 
@@ -473,14 +505,14 @@ class ChessGame:
             pygame.draw.rect(self.screen, color, btn_rect, border_radius=10)
             pygame.draw.rect(self.screen, GOLD, btn_rect, 3, border_radius=10)
 
-            btn_text = self.font.render(text, True, 'white')
+            btn_text = render_text(self.font, text, 'white')
             btn_text_rect = btn_text.get_rect(center=btn_rect.center)
             self.screen.blit(btn_text, btn_text_rect)
 
         # scroll indicators
         if self.history_view == 'overview':
             scroll_text = f"Scroll: {self.history_scroll} (↑↓ keys)"
-            scroll_surface = self.small_font.render(scroll_text, True, LIGHT_GRAY)
+            scroll_surface = render_text(self.small_font, scroll_text, LIGHT_GRAY)
             self.screen.blit(scroll_surface, (500, controls_y + 15))
 
     def handle_history_click(self, pos):
@@ -607,7 +639,7 @@ class ChessGame:
         self.screen.fill(DARK_GRAY)
 
         # Header
-        header = self.big_font.render("Statistical Charts", True, GOLD)
+        header = render_text(self.big_font, "Statistical Charts", GOLD)
         header_rect = header.get_rect(center=(WIDTH // 2, 50))
         self.screen.blit(header, header_rect)
 
@@ -615,7 +647,7 @@ class ChessGame:
         charts_dir = self.stats.save_directory / "charts"
         if not charts_dir.exists():
             # No charts available yet
-            no_data_text = self.font.render("No charts available. Generate charts first.", True, CREAM_WHITE)
+            no_data_text = render_text(self.font, "No charts available. Generate charts first.", CREAM_WHITE)
             no_data_rect = no_data_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
             self.screen.blit(no_data_text, no_data_rect)
 
@@ -623,7 +655,7 @@ class ChessGame:
             back_btn = pygame.Rect(30, HEIGHT - 80, 120, 50)
             pygame.draw.rect(self.screen, WOOD_DARK, back_btn, border_radius=10)
             pygame.draw.rect(self.screen, GOLD, back_btn, 3, border_radius=10)
-            back_text = self.font.render("Back", True, CREAM_WHITE)
+            back_text = render_text(self.font, "Back", CREAM_WHITE)
             back_text_rect = back_text.get_rect(center=back_btn.center)
             self.screen.blit(back_text, back_text_rect)
 
@@ -636,7 +668,7 @@ class ChessGame:
         # Get list of chart files
         chart_files = [f for f in charts_dir.glob("*.png")]
         if not chart_files:
-            no_data_text = self.font.render("No charts available. Generate charts first.", True, CREAM_WHITE)
+            no_data_text = render_text(self.font, "No charts available. Generate charts first.", CREAM_WHITE)
             no_data_rect = no_data_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
             self.screen.blit(no_data_text, no_data_rect)
 
@@ -644,7 +676,7 @@ class ChessGame:
             back_btn = pygame.Rect(30, HEIGHT - 80, 120, 50)
             pygame.draw.rect(self.screen, WOOD_DARK, back_btn, border_radius=10)
             pygame.draw.rect(self.screen, GOLD, back_btn, 3, border_radius=10)
-            back_text = self.font.render("Back", True, CREAM_WHITE)
+            back_text = render_text(self.font, "Back", CREAM_WHITE)
             back_text_rect = back_text.get_rect(center=back_btn.center)
             self.screen.blit(back_text, back_text_rect)
 
@@ -673,7 +705,7 @@ class ChessGame:
 
             # Chart title - remove file extension and replace underscores with spaces
             chart_name = current_chart.stem.replace('_', ' ').title()
-            title = self.font.render(chart_name, True, CREAM_WHITE)
+            title = render_text(self.font, chart_name, CREAM_WHITE)
             self.screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 110))
 
             # Navigation buttons
@@ -682,13 +714,13 @@ class ChessGame:
 
             pygame.draw.rect(self.screen, BLUE, prev_btn, border_radius=10)
             pygame.draw.rect(self.screen, GOLD, prev_btn, 3, border_radius=10)
-            prev_text = self.font.render("Previous", True, CREAM_WHITE)
+            prev_text = render_text(self.font, "Previous", CREAM_WHITE)
             prev_text_rect = prev_text.get_rect(center=prev_btn.center)
             self.screen.blit(prev_text, prev_text_rect)
 
             pygame.draw.rect(self.screen, BLUE, next_btn, border_radius=10)
             pygame.draw.rect(self.screen, GOLD, next_btn, 3, border_radius=10)
-            next_text = self.font.render("Next", True, CREAM_WHITE)
+            next_text = render_text(self.font, "Next", CREAM_WHITE)
             next_text_rect = next_text.get_rect(center=next_btn.center)
             self.screen.blit(next_text, next_text_rect)
 
@@ -696,26 +728,26 @@ class ChessGame:
             back_btn = pygame.Rect(30, HEIGHT - 100, 50, 50)
             pygame.draw.rect(self.screen, WOOD_DARK, back_btn, border_radius=10)
             pygame.draw.rect(self.screen, GOLD, back_btn, 3, border_radius=10)
-            back_text = self.font.render("←", True, CREAM_WHITE)
+            back_text = render_text(self.font, "←", CREAM_WHITE)
             back_text_rect = back_text.get_rect(center=back_btn.center)
             self.screen.blit(back_text, back_text_rect)
 
             # Chart count indicator
-            count_text = self.font.render(f"Chart {self.current_chart_index + 1} of {len(chart_files)}",
-                                          True, CREAM_WHITE)
+            count_text = render_text(self.font, f"Chart {self.current_chart_index + 1} of {len(chart_files)}",
+                                     CREAM_WHITE)
             self.screen.blit(count_text, (WIDTH // 2 - count_text.get_width() // 2, HEIGHT - 100))
 
             return back_btn, (prev_btn, next_btn)
 
         except Exception as e:
-            error_text = self.font.render(f"Error loading chart: {e}", True, CREAM_WHITE)
+            error_text = render_text(self.font, f"Error loading chart: {e}", CREAM_WHITE)
             self.screen.blit(error_text, (WIDTH // 2 - error_text.get_width() // 2, HEIGHT // 2))
 
             # Back button only
             back_btn = pygame.Rect(30, HEIGHT - 80, 120, 50)
             pygame.draw.rect(self.screen, WOOD_DARK, back_btn, border_radius=10)
             pygame.draw.rect(self.screen, GOLD, back_btn, 3, border_radius=10)
-            back_text = self.font.render("Back", True, CREAM_WHITE)
+            back_text = render_text(self.font, "Back", CREAM_WHITE)
             back_text_rect = back_text.get_rect(center=back_btn.center)
             self.screen.blit(back_text, back_text_rect)
 
@@ -725,7 +757,7 @@ class ChessGame:
         """Handle the chart viewer screen"""
         back_btn, nav_btns = self.show_chart_viewer()
 
-        for event in pygame.event.get():
+        for event in self.events:
             if event.type == pygame.QUIT:
                 return False
 
@@ -768,7 +800,7 @@ class ChessGame:
         self.screen.fill(DARK_GRAY)
 
         # title
-        title = self.big_font.render("Select Time Control", True, GOLD)
+        title = render_text(self.big_font, "Select Time Control", GOLD)
         title_rect = title.get_rect(center=(WIDTH // 2, 150))
         self.screen.blit(title, title_rect)
 
@@ -791,10 +823,10 @@ class ChessGame:
             pygame.draw.rect(self.screen, GOLD if hover else WOOD_DARK, button, 4, border_radius=15)
 
             # button text
-            button_font = pygame.font.Font('freesansbold.ttf', 36)
+            button_font = get_font(36)
             minutes = TIME_CONTROLS[i] // 60
             text = f"{TIME_NAMES[i]}: {minutes} minute{'s' if minutes > 1 else ''}"
-            button_text = button_font.render(text, True, CREAM_WHITE)
+            button_text = render_text(button_font, text, CREAM_WHITE)
             text_rect = button_text.get_rect(center=button.center)
             self.screen.blit(button_text, text_rect)
 
@@ -807,12 +839,12 @@ class ChessGame:
         pygame.draw.rect(self.screen, WOOD_DARK, back_button, border_radius=10)
         pygame.draw.rect(self.screen, GOLD if back_hover else WOOD_BROWN, back_button, 3, border_radius=10)
 
-        back_text = self.font.render("Back", True, CREAM_WHITE)
+        back_text = render_text(self.font, "Back", CREAM_WHITE)
         back_text_rect = back_text.get_rect(center=back_button.center)
         self.screen.blit(back_text, back_text_rect)
 
         # check clicks
-        for event in pygame.event.get():
+        for event in self.events:
             if event.type == pygame.QUIT:
                 return False
 
@@ -840,6 +872,7 @@ class ChessGame:
         return True
 
     def start_game(self):
+        self.stop_computer()
         self.game_state = PLAYING
         # reset game state
         self.turn_step = 0
@@ -851,6 +884,7 @@ class ChessGame:
         self.winner = ''
         self.winner_by_time = False
         self.game_over = False
+        self.game_saved = False
         self.white_promote = False
         self.black_promote = False
         self.promo_index = 100
@@ -875,6 +909,7 @@ class ChessGame:
                 self.winner = BLACK
                 self.winner_by_time = True
                 self.game_over = True
+                self.stop_computer()
         else:  # black's turn
             self.black_time -= elapsed
             if self.black_time <= 0:
@@ -882,6 +917,7 @@ class ChessGame:
                 self.winner = WHITE
                 self.winner_by_time = True
                 self.game_over = True
+                self.stop_computer()
 
         self.last_move_time = current_time
 
@@ -896,16 +932,9 @@ class ChessGame:
                 self.board_flipped = not self.board_flipped
                 self.last_flip_time = current_time
 
-            # draw game elements
-            self.screen.fill(DARK_GRAY)
-            self.board.draw_board(self.board_flipped)
-            self.board.draw_status_area(self.turn_step, self.white_time, self.black_time)
-            self.board.draw_pieces(self.turn_step, self.selection, self.board_flipped)
-            self.board.draw_captured()
-
             # check status
             previous_check = self.check
-            self.check = self.board.draw_check(self.counter, self.board_flipped)
+            self.check = self.board.status().check
 
             # track when check happens
             if self.check and not previous_check:
@@ -914,19 +943,15 @@ class ChessGame:
             # pawn promotion
             if not self.game_over:
                 self.check_promotion()
-                if self.white_promote:
-                    self.board.draw_promotion(WHITE, self.turn_step)
-                    self.check_promotion_selection()
-                elif self.black_promote:
-                    self.board.draw_promotion(BLACK, self.turn_step)
+                if self.white_promote or self.black_promote:
                     self.check_promotion_selection()
 
-            # show valid moves
-            if self.selection != 100 and (self.turn_step == 1 or self.turn_step == 3):
-                self.draw_valid_moves()
+            # computer's move comes from the worker process, the loop keeps drawing meanwhile
+            if self.is_computer_turn():
+                self.update_computer_move()
 
             # handle player clicks and keys
-            for event in pygame.event.get():
+            for event in self.events:
                 if event.type == pygame.QUIT:
                     return False
 
@@ -938,9 +963,12 @@ class ChessGame:
 
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:
+                        self.stop_computer()
                         self.game_state = MENU
                     elif event.key == pygame.K_f:
                         pass  # already handled above
+                    elif event.key == pygame.K_h:
+                        self.show_hanging = not self.show_hanging
                     elif self.game_over and event.key == pygame.K_RETURN:
                         self.reset_game()
 
@@ -953,22 +981,102 @@ class ChessGame:
                     self.winner = WHITE
                     self.game_over = True
 
-            # game over screen
-            if self.winner:
-                self.draw_game_over()
+            # draw only when something on screen changed
+            self.renderer.present(self.gameplay_regions(), self.draw_gameplay)
 
-                # save stats when game ends
-                if self.game_over:
-                    time_control = TIME_CONTROLS[self.time_control]
-                    white_time_used = time_control - self.white_time
-                    black_time_used = time_control - self.black_time
-                    self.stats.end_game(self.winner, white_time_used, black_time_used)
+            # save stats once when the game ends
+            if self.winner and self.game_over and not self.game_saved:
+                time_control = TIME_CONTROLS[self.time_control]
+                white_time_used = time_control - self.white_time
+                black_time_used = time_control - self.black_time
+                self.stats.record_opening(opening_name(self.board.pos))
+                self.stats.end_game(self.winner, white_time_used, black_time_used)
+                self.game_saved = True
 
         except Exception as e:
             print(f"Error in gameplay: {e.__class__.__name__}: {e}")
 
         return True
 
+    def hanging_color(self):
+        # the player's pieces against the computer, otherwise the side to move
+        return self.player_color if self.computer_plays else (WHITE if self.turn_step < 2 else BLACK)
+
+    def showing_valid_moves(self):
+        return self.selection != 100 and (self.turn_step == 1 or self.turn_step == 3)
+
+    def draw_gameplay(self):
+        # draw game elements
+        self.screen.fill(DARK_GRAY)
+        self.board.draw_board(self.board_flipped)
+        self.board.draw_status_area(self.turn_step, self.white_time, self.black_time)
+        self.board.draw_pieces(self.turn_step, self.selection, self.board_flipped)
+        self.board.draw_captured()
+        if self.show_hanging and not self.game_over:
+            self.board.draw_hanging_pieces(self.hanging_color(), self.board_flipped)
+        if not self.game_over:
+            self.board.draw_endgame_verdict()
+        self.board.draw_check(self.counter, self.board_flipped)
+
+        # pawn promotion
+        if not self.game_over:
+            if self.white_promote:
+                self.board.draw_promotion(WHITE, self.turn_step)
+            elif self.black_promote:
+                self.board.draw_promotion(BLACK, self.turn_step)
+
+        # show valid moves
+        if self.showing_valid_moves():
+            self.draw_valid_moves()
+
+        # game over screen
+        if self.winner:
+            self.draw_game_over()
+
+    def gameplay_regions(self):
+        # What each part of the gameplay screen shows, for the dirty-rectangle renderer
+        board = self.board
+        flipped = self.board_flipped
+        regions = {
+            # rare changes that touch most of the screen push all of it
+            'screen': (self.screen.get_rect(), (id(board), flipped, self.winner, self.winner_by_time,
+                                                self.game_over, self.white_promote, self.black_promote)),
+            'turn': ((0, 810, 230, 80), self.turn_step < 2),  # the label runs past its box
+            'white_clock': ((240, 820, 120, 60), int(self.white_time)),
+            'black_clock': ((380, 820, 120, 60), int(self.black_time)),
+            'captured': ((810, 150, 380, 500), (len(board.captured_white), len(board.captured_black))),
+            'verdict': ((800, 655, 400, 40), None if self.game_over else board.endgame_verdict()),
+        }
+        if self.white_promote or self.black_promote:
+            regions['promotion'] = ((850, 200, 300, 450), board.highlight_promotion_option)
+
+        # per square: piece, selection frame, move marker and hanging frame
+        selected = None
+        if self.selection != 100:
+            pieces = board.white_pieces if self.turn_step < 2 else board.black_pieces
+            if self.selection < len(pieces):
+                selected = pieces[self.selection].position
+        markers = set(self.valid_moves) if self.showing_valid_moves() else ()
+        hanging = ()
+        if self.show_hanging and not self.game_over:
+            hanging = {piece.position for piece in board.get_hanging_pieces(self.hanging_color())}
+        squares = board.pos.squares
+        for square in range(64):
+            position = SQUARE_POSITIONS[square]
+            regions[square] = (board.square_rect(position, flipped),
+                               (squares[square], position == selected, position in markers, position in hanging))
+
+        if self.castling_moves and self.showing_valid_moves():
+            regions['castling'] = (board.castling_rect(self.castling_moves, flipped), tuple(self.castling_moves))
+
+        # the pulse reaches a few pixels past the king's square
+        in_check = board.status().in_check
+        for color in (WHITE, BLACK):
+            if in_check[COLOR_INDEX[color]]:
+                king = SQUARE_POSITIONS[board.pos.king_square(COLOR_INDEX[color])]
+                regions['check', color] = (board.square_rect(king, flipped).inflate(20, 20), self.counter)
+        return regions
+
     def handle_mouse_click(self, pos):
         # convert mouse position to board squares
         square_size = self.board.square_size
@@ -987,8 +1095,16 @@ class ChessGame:
             # check forfeit button
             forfeit_rect = pygame.Rect(850, 830, 220, 50)
             if forfeit_rect.collidepoint(pos):
-                self.winner = BLACK if self.turn_step <= 1 else WHITE
+                if self.computer_plays:
+                    self.winner = self.computer_color()
+                else:
+                    self.winner = BLACK if self.turn_step <= 1 else WHITE
                 self.game_over = True
+                self.stop_computer()
+            return
+
+        # the computer's pieces are not for the player to move
+        if self.is_computer_turn():
             return
 
         click_coords = (x_coord, y_coord)
@@ -1070,9 +1186,9 @@ class ChessGame:
                                              p.piece_type == 'rook' and p.position[0] < piece.position[0]), None)
 
                             if rook:
-                                # move both pieces
-                                piece.move(king_pos)
-                                rook.move(rook_pos)
+                                # king move of two files also moves the rook
+                                self.board.make_move(encode_move(square_index(piece.position),
+                                                                 square_index(king_pos)))
                                 self.last_move_time = pygame.time.get_ticks()
 
                                 # record castling
@@ -1092,126 +1208,132 @@ class ChessGame:
                         self.get_valid_moves()
                         break
 
-    def is_move_safe_for_king(self, piece, new_position, color):
-        """Check if this move puts our king in danger"""
-        # save current state
-        original_position = piece.position
-        captured_piece = self.board.get_piece_at_position(new_position)
-        captured_white = None
-        captured_black = None
-
-        # simulate capture
-        if captured_piece:
-            if captured_piece.color == WHITE:
-                self.board.white_pieces.remove(captured_piece)
-                captured_white = captured_piece
-            else:
-                self.board.black_pieces.remove(captured_piece)
-                captured_black = captured_piece
+    def computer_color(self):
+        return BLACK if self.player_color == WHITE else WHITE
+
+    def is_computer_turn(self):
+        if not self.computer_plays or self.game_over or self.white_promote or self.black_promote:
+            return False
+        return (self.turn_step < 2) == (self.computer_color() == WHITE)
+
+    def update_computer_move(self):
+        """Start the computer's search, or play its move once the worker has one"""
+        if self.engine is None:
+            self.engine = EngineWorker(ENGINE_HASH_MB, ENGINE_THREADS)
+
+        if not self.engine.searching:
+            book_move = self.book.choose(self.board.pos) if self.book is not None else None
+            if book_move:
+                # book moves are played at once, without using the clock
+                print(f"Engine: {move_name(book_move)} from the opening book")
+                self.play_computer_move(book_move, 0)
+                return
+            if self.board.get_legal_moves():
+                color = self.computer_color()
+                remaining = self.white_time if color == WHITE else self.black_time
+                self.engine.start_search(self.board.pos, allocate_time(remaining))
+            return
 
-        # simulate move
-        piece.position = new_position
+        result = self.engine.poll()
+        if result is None or result.move is None:
+            return
+        self.last_search = result
+        print(f"Engine: {move_name(result.move)} score {result.score} depth {result.depth}, "
+              f"{result.nodes} nodes, {result.nps} nodes/s, hash hits {result.tt_hit_rate:.0%}, "
+              f"hash {result.hashfull / 10:.1f}% full")
+        self.play_computer_move(result.move, result.time)
+
+    def stop_computer(self):
+        # Abandon the computer's search, e.g. on timeout, resignation or leaving the game
+        if self.engine is not None and self.engine.searching:
+            self.engine.stop()
+
+    def play_computer_move(self, move, move_time):
+        color = self.computer_color()
+        from_square = move & 63
+        target = SQUARE_POSITIONS[move >> 6 & 63]
+        piece = self.board.piece_squares[from_square]
+        piece_type = piece.piece_type
+
+        if piece_type == 'king' and abs(target[0] - piece.position[0]) == 2:
+            # king move of two files also moves the rook
+            self.board.make_move(move)
+            self.last_move_time = pygame.time.get_ticks()
+            self.stats.record_move('king', color, target, True, False, move_time)
+        else:
+            is_en_passant = piece_type == 'pawn' and \
+                target == (self.board.black_ep if color == WHITE else self.board.white_ep)
+            self.move_piece(piece, target, move >> 12)
+            self.stats.record_move(piece_type, color, target, False, is_en_passant, move_time)
+            if move >> 12:
+                self.stats.record_promotion(TYPE_NAMES[move >> 12], color, target)
+
+        # end turn
+        self.turn_step = 2 if color == WHITE else 0
+        self.selection = 100
+        self.valid_moves = []
+        self.castling_moves = []
 
-        # check if our king is safe
+    def is_move_safe_for_king(self, piece, new_position, color):
+        """Check if this move puts our king in danger"""
+        self.board.make_move(encode_move(square_index(piece.position), square_index(new_position)))
         king_safe = not self.board.is_king_in_check(color)
-
-        # restore everything
-        piece.position = original_position
-
-        if captured_white:
-            self.board.white_pieces.append(captured_white)
-        if captured_black:
-            self.board.black_pieces.append(captured_black)
-
+        self.board.unmake_move()
         return king_safe
 
     def get_valid_moves(self):
         self.valid_moves = []
         self.castling_moves = []
 
-        if self.turn_step <= 1:
-            # white's turn
-            if 0 <= self.selection < len(self.board.white_pieces):
-                piece = self.board.white_pieces[self.selection]
-                all_possible_moves = piece.get_valid_moves()
-
-                # only include moves that don't put king in check
-                for move in all_possible_moves:
-                    if self.is_move_safe_for_king(piece, move, WHITE):
-                        self.valid_moves.append(move)
-
-                # check for castling
-                if piece.piece_type == 'king':
-                    self.castling_moves = self.board.check_castling(piece.color)
-        else:
-            # black's turn
-            if 0 <= self.selection < len(self.board.black_pieces):
-                piece = self.board.black_pieces[self.selection]
-                all_possible_moves = piece.get_valid_moves()
-
-                # only include moves that don't put king in check
-                for move in all_possible_moves:
-                    if self.is_move_safe_for_king(piece, move, BLACK):
-                        self.valid_moves.append(move)
-
-                # check for castling
-                if piece.piece_type == 'king':
-                    self.castling_moves = self.board.check_castling(piece.color)
-
-    def move_piece(self, piece, new_position):
+        pieces = self.board.white_pieces if self.turn_step <= 1 else self.board.black_pieces
+        if not 0 <= self.selection < len(pieces):
+            return
+        piece = pieces[self.selection]
+        from_square = square_index(piece.position)
+
+        # legal moves of the whole side come from one generator call
+        for move in self.board.get_legal_moves():
+            if move & 63 != from_square:
+                continue
+            to_square = move >> 6 & 63
+            target = SQUARE_POSITIONS[to_square]
+
+            if piece.piece_type == 'king' and abs(to_square - from_square) == 2:
+                # castling, shown with the rook's destination
+                rook_x = 5 if to_square > from_square else 3
+                self.castling_moves.append((target, (rook_x, target[1])))
+            elif target not in self.valid_moves:
+                # promotions share one target square
+                self.valid_moves.append(target)
+
+    def move_piece(self, piece, new_position, promotion=0):
         capture_occurred = False
 
         # check for en passant
-        if piece.piece_type == 'pawn':
+        captured_piece = self.board.get_piece_at_position(new_position)
+        if piece.piece_type == 'pawn' and captured_piece is None:
             if piece.color == WHITE and new_position == self.board.black_ep:
-                captured_pos = (new_position[0], new_position[1] - 1)
-                captured_piece = self.board.get_piece_at_position(captured_pos)
-                if captured_piece:
-                    self.board.black_pieces.remove(captured_piece)
-                    self.board.captured_black.append(captured_piece)
-                    capture_occurred = True
+                captured_piece = self.board.get_piece_at_position((new_position[0], new_position[1] - 1))
             elif piece.color == BLACK and new_position == self.board.white_ep:
-                captured_pos = (new_position[0], new_position[1] + 1)
-                captured_piece = self.board.get_piece_at_position(captured_pos)
-                if captured_piece:
-                    self.board.white_pieces.remove(captured_piece)
-                    self.board.captured_white.append(captured_piece)
-                    capture_occurred = True
-
-        # update en passant square for future turns
-        if piece.piece_type == 'pawn' and abs(piece.position[1] - new_position[1]) == 2:
-            middle_y = (piece.position[1] + new_position[1]) // 2
-            if piece.color == WHITE:
-                self.board.white_ep = (new_position[0], middle_y)
-            else:
-                self.board.black_ep = (new_position[0], middle_y)
-        else:
-            # reset en passant
-            if piece.color == WHITE:
-                self.board.white_ep = (100, 100)
-            else:
-                self.board.black_ep = (100, 100)
+                captured_piece = self.board.get_piece_at_position((new_position[0], new_position[1] + 1))
 
-        # handle normal captures
-        captured_piece = self.board.get_piece_at_position(new_position)
+        # handle captures
         if captured_piece:
             if captured_piece.piece_type == 'king':
                 print("Error: Cannot capture a king")
                 return False
 
             if captured_piece.color == WHITE:
-                self.board.white_pieces.remove(captured_piece)
                 self.board.captured_white.append(captured_piece)
             else:
-                self.board.black_pieces.remove(captured_piece)
                 self.board.captured_black.append(captured_piece)
             capture_occurred = True
 
             # track capture
             self.stats.record_capture(captured_piece.piece_type, piece.color)
 
-        # actually move the piece
-        piece.move(new_position)
+        # actually move the piece (also updates en passant squares)
+        self.board.make_move(encode_move(square_index(piece.position), square_index(new_position), promotion))
         self.last_move_time = pygame.time.get_ticks()
 
         # check for checkmate
@@ -1258,9 +1380,10 @@ class ChessGame:
             pawn = self.board.white_pieces[self.promo_index]
             pawn_pos = pawn.position
 
-            # replace pawn with chosen piece
-            self.board.white_pieces.pop(self.promo_index)
-            self.board.white_pieces.append(ChessPiece(promotion_piece, WHITE, pawn_pos, self.board))
+            # replay the pawn move as a promotion to the chosen piece
+            last_move = self.board.pos.history[-1][0]
+            self.board.unmake_move()
+            self.board.make_move(last_move | TYPE_INDEX[promotion_piece] << 12)
 
             self.white_promote = False
 
@@ -1276,9 +1399,10 @@ class ChessGame:
             pawn = self.board.black_pieces[self.promo_index]
             pawn_pos = pawn.position
 
-            # replace pawn with chosen piece
-            self.board.black_pieces.pop(self.promo_index)
-            self.board.black_pieces.append(ChessPiece(promotion_piece, BLACK, pawn_pos, self.board))
+            # replay the pawn move as a promotion to the chosen piece
+            last_move = self.board.pos.history[-1][0]
+            self.board.unmake_move()
+            self.board.make_move(last_move | TYPE_INDEX[promotion_piece] << 12)
 
             self.black_promote = False
 
@@ -1333,16 +1457,16 @@ class ChessGame:
         pygame.draw.rect(self.screen, winner_color, panel_rect, 5, border_radius=15)
 
         # winner message
-        title_font = pygame.font.Font('freesansbold.ttf', 48)
-        message_font = pygame.font.Font('freesansbold.ttf', 24)
+        title_font = get_font(48)
+        message_font = get_font(24)
 
         win_text = "White Wins!" if self.winner == WHITE else "Black Wins!"
 
         if self.winner_by_time:
             win_text += " (Timeout)"
 
-        title = title_font.render(win_text, True, CREAM_WHITE)
-        message = message_font.render("Press Enter to play again", True, CREAM_WHITE)
+        title = render_text(title_font, win_text, CREAM_WHITE)
+        message = render_text(message_font, "Press Enter to play again", CREAM_WHITE)
 
         self.screen.blit(title, (panel_rect.centerx - title.get_width() // 2, panel_rect.y + 60))
         self.screen.blit(message, (panel_rect.centerx - message.get_width() // 2, panel_rect.y + 120))
@@ -1350,6 +1474,7 @@ class ChessGame:
         self.game_over = True
 
     def reset_game(self):
+        self.stop_computer()
         # keep settings but reset board
         playing_as_white = self.board.playing_as_white
         current_time_control = self.time_control
@@ -1368,6 +1493,7 @@ class ChessGame:
         self.winner = ''
         self.winner_by_time = False
         self.game_over = False
+        self.game_saved = False
         self.white_promote = False
         self.black_promote = False
         self.promo_index = 100
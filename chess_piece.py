@@ -1,58 +1,45 @@
-import pygame
 from constants import *
+from sprites import piece_sprite, board_size_for, CAPTURED_PIECE_SIZE
+from chess_rules.position import COLOR_INDEX, square_index
+from chess_rules.attack_tables import (SQUARE_POSITIONS, KNIGHT_TARGETS, KING_TARGETS, RAYS,
+                                       ROOK_DIRECTIONS, BISHOP_DIRECTIONS, PAWN_ATTACK_TARGETS)
 
 
 class ChessPiece:
+    # Pieces are small sprites over the board's Position; graphics come from the atlas by code
+    __slots__ = ('piece_type', 'color', 'color_index', 'on_board', 'list_index', '_position', 'board',
+                 'has_moved')
+
     def __init__(self, piece_type, color, position, board):
         self.piece_type = piece_type
         self.color = color
-        self.position = position
+        self.color_index = COLOR_INDEX[color]
+        self.on_board = False  # set while the board tracks this piece
+        self.list_index = -1  # slot in the board's piece list of its color while on the board
+        self._position = position
         self.board = board
         self.has_moved = False
-        self.load_image()
-
-    def load_image(self):
-        # Use color names for image loading
-        color_name = "white" if self.color == WHITE else "black"
-
-        try:
-            img_name = f"images/{color_name} {self.piece_type}.png"
-            self.image = pygame.image.load(img_name)
-
-            # Size images for the board
-            if self.piece_type == 'pawn':
-                self.image = pygame.transform.scale(self.image, (65, 65))
-            else:
-                self.image = pygame.transform.scale(self.image, (70, 70))
-
-            # Create small version for captured pieces
-            self.small_image = pygame.transform.scale(self.image, (40, 40))
-        except pygame.error as e:
-            print(f"Error loading image: {e}")
-            # Create placeholder if image fails to load
-            self.image = self.create_placeholder_image()
-            self.small_image = pygame.transform.scale(self.image, (40, 40))
-
-    def create_placeholder_image(self):
-        # Create simple colored rectangle as placeholder
-        size = 70
-        surface = pygame.Surface((size, size), pygame.SRCALPHA)
-
-        # Fill with color
-        bg_color = CREAM_WHITE if self.color == WHITE else (50, 50, 50)
-        pygame.draw.rect(surface, bg_color, (0, 0, size, size))
-
-        # Draw piece type text
-        font = pygame.font.Font('freesansbold.ttf', 20)
-        text = font.render(self.piece_type[0].upper(), True,
-                          (50, 50, 50) if self.color == WHITE else CREAM_WHITE)
-        text_rect = text.get_rect(center=(size // 2, size // 2))
-        surface.blit(text, text_rect)
-
-        # Draw border
-        pygame.draw.rect(surface, GOLD, (0, 0, size, size), 2)
-
-        return surface
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, new_position):
+        # Keep the board's bitboards in sync with the piece
+        old_position = self._position
+        self._position = new_position
+        if self.on_board and old_position != new_position:
+            self.board.relocate_piece(self, old_position, new_position)
+
+    @property
+    def image(self):
+        # Shared sprite from the atlas, pieces never own surfaces
+        return piece_sprite(self.color, self.piece_type, board_size_for(self.piece_type))
+
+    @property
+    def small_image(self):
+        return piece_sprite(self.color, self.piece_type, CAPTURED_PIECE_SIZE)
 
     def draw(self, screen):
         square_size = self.board.square_size
@@ -87,153 +74,81 @@ class ChessPiece:
         # Logic for pawn moves
         moves = []
         x, y = self.position
+        square = y * 8 + x
+        occupied = self.board.pos.occupied
+        opponents = self.board.pos.colors[1 - self.color_index]
 
         if self.color == WHITE:
-            # Forward moves
-            if (x, y + 1) not in self.board.get_all_piece_positions() and y < 7:
-                moves.append((x, y + 1))
-                # First move can be two squares
-                if not self.has_moved and (x, y + 2) not in self.board.get_all_piece_positions():
-                    moves.append((x, y + 2))
-
-            # Capture moves
-            for dx in [-1, 1]:
-                capture_pos = (x + dx, y + 1)
-                if capture_pos in self.board.get_opponent_positions(self.color):
-                    moves.append(capture_pos)
-
-            # En passant
-            if (x + 1, y + 1) == self.board.get_en_passant_square(BLACK):
-                moves.append((x + 1, y + 1))
-            if (x - 1, y + 1) == self.board.get_en_passant_square(BLACK):
-                moves.append((x - 1, y + 1))
+            step = 8
+            last_rank = y == 7
+            en_passant = self.board.get_en_passant_square(BLACK)
         else:
-            # Black pawn moves (reverse direction)
-            # Forward moves
-            if (x, y - 1) not in self.board.get_all_piece_positions() and y > 0:
-                moves.append((x, y - 1))
-                # First move can be two squares
-                if not self.has_moved and (x, y - 2) not in self.board.get_all_piece_positions():
-                    moves.append((x, y - 2))
-
-            # Capture moves
-            for dx in [-1, 1]:
-                capture_pos = (x + dx, y - 1)
-                if capture_pos in self.board.get_opponent_positions(self.color):
-                    moves.append(capture_pos)
-
-            # En passant
-            if (x + 1, y - 1) == self.board.get_en_passant_square(WHITE):
-                moves.append((x + 1, y - 1))
-            if (x - 1, y - 1) == self.board.get_en_passant_square(WHITE):
-                moves.append((x - 1, y - 1))
+            # Black pawns move in reverse direction
+            step = -8
+            last_rank = y == 0
+            en_passant = self.board.get_en_passant_square(WHITE)
+
+        # Forward moves
+        forward = square + step
+        if not last_rank and not occupied >> forward & 1:
+            moves.append(SQUARE_POSITIONS[forward])
+            # First move can be two squares
+            double = forward + step
+            if not self.has_moved and 0 <= double < 64 and not occupied >> double & 1:
+                moves.append(SQUARE_POSITIONS[double])
+
+        # Capture moves and en passant
+        for target in PAWN_ATTACK_TARGETS[self.color_index][square]:
+            if opponents >> target & 1 or SQUARE_POSITIONS[target] == en_passant:
+                moves.append(SQUARE_POSITIONS[target])
 
         return moves
 
-    def _check_rook_moves(self):
-        # Logic for rook moves
+    def _slide(self, directions):
+        # Walk each precomputed ray until a blocking piece
         moves = []
-        x, y = self.position
-
-        # Check 4 directions (up, down, left, right)
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for dx, dy in directions:
-            for dist in range(1, 8):  # Check all squares in a direction
-                new_pos = (x + dist * dx, y + dist * dy)
-                # Check if position is on the board
-                if not (0 <= new_pos[0] <= 7 and 0 <= new_pos[1] <= 7):
-                    break
+        square = square_index(self.position)
+        own = self.board.pos.colors[self.color_index]
+        occupied = self.board.pos.occupied
 
+        for direction in directions:
+            for target in RAYS[direction][square]:
                 # Check if position has a friendly piece
-                if new_pos in self.board.get_piece_positions(self.color):
+                if own >> target & 1:
                     break
 
-                moves.append(new_pos)
+                moves.append(SQUARE_POSITIONS[target])
 
                 # If we hit an enemy piece, stop after adding this move
-                if new_pos in self.board.get_opponent_positions(self.color):
+                if occupied >> target & 1:
                     break
 
         return moves
 
-    def _check_knight_moves(self):
-        # Logic for knight moves
-        moves = []
-        x, y = self.position
-
-        # Knights move in L-shape
-        possible_moves = [
-            (x + 1, y + 2), (x + 2, y + 1), (x + 2, y - 1), (x + 1, y - 2),
-            (x - 1, y - 2), (x - 2, y - 1), (x - 2, y + 1), (x - 1, y + 2)
-        ]
-
-        for new_pos in possible_moves:
-            # Check if position is on the board
-            if not (0 <= new_pos[0] <= 7 and 0 <= new_pos[1] <= 7):
-                continue
-
-            # Check if position has a friendly piece
-            if new_pos in self.board.get_piece_positions(self.color):
-                continue
-
-            moves.append(new_pos)
+    def _check_rook_moves(self):
+        # Check 4 directions (up, down, left, right)
+        return self._slide(ROOK_DIRECTIONS)
 
-        return moves
+    def _check_knight_moves(self):
+        # Knights move in L-shape, targets come from the table
+        own = self.board.pos.colors[self.color_index]
+        return [SQUARE_POSITIONS[target] for target in KNIGHT_TARGETS[square_index(self.position)]
+                if not own >> target & 1]
 
     def _check_bishop_moves(self):
-        # Logic for bishop moves
-        moves = []
-        x, y = self.position
-
         # Check 4 diagonal directions
-        for dx, dy in [(1, 1), (1, -1), (-1, 1), (-1, -1)]:
-            for dist in range(1, 8):
-                new_pos = (x + dist * dx, y + dist * dy)
-                # Check if position is on the board
-                if not (0 <= new_pos[0] <= 7 and 0 <= new_pos[1] <= 7):
-                    break
-
-                # Check if position has a friendly piece
-                if new_pos in self.board.get_piece_positions(self.color):
-                    break
-
-                moves.append(new_pos)
-
-                # If we hit an enemy piece, stop after adding this move
-                if new_pos in self.board.get_opponent_positions(self.color):
-                    break
-
-        return moves
+        return self._slide(BISHOP_DIRECTIONS)
 
     def _check_queen_moves(self):
         # Queen combines rook and bishop moves
         return self._check_rook_moves() + self._check_bishop_moves()
 
     def _check_king_moves(self):
-        # Logic for king moves
-        moves = []
+        # Regular moves in all 8 directions, castling is handled by the board class
+        own = self.board.pos.colors[self.color_index]
+        moves = [SQUARE_POSITIONS[target] for target in KING_TARGETS[square_index(self.position)]
+                 if not own >> target & 1]
         castling_moves = []
-        x, y = self.position
-
-        # Regular moves in all 8 directions
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue  # Skip current position
-
-                new_pos = (x + dx, y + dy)
-                # Check if position is on the board
-                if not (0 <= new_pos[0] <= 7 and 0 <= new_pos[1] <= 7):
-                    continue
-
-                # Check if position has a friendly piece
-                if new_pos in self.board.get_piece_positions(self.color):
-                    continue
-
-                moves.append(new_pos)
-
-        # Castling logic is handled by the board class
         return moves, castling_moves
 
     def move(self, new_position):
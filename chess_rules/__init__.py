@@ -0,0 +1,12 @@
+"""Chess rules without any graphics.
+
+Pure-Python position, move encoding, legal move generation and game result
+detection. Nothing here imports pygame or matplotlib, so the rules can run
+on servers, in batch analysis and in tests without a display.
+"""
+from .position import (Position, START_FEN, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                       TYPE_NAMES, TYPE_INDEX, WHITE_INDEX, BLACK_INDEX, COLOR_NAMES, COLOR_INDEX,
+                       square_index, square_position, square_name, parse_square)
+from .move import encode_move, move_from, move_to, move_promotion, move_name, parse_move
+from .movegen import generate_legal_moves, attackers_to, is_square_attacked, is_in_check, attack_map
+from .result import game_result, has_insufficient_material
@@ -0,0 +1,69 @@
+"""Precomputed move tables for every square, built once at import time.
+
+Move generators walk these tables instead of doing coordinate arithmetic
+and bounds checks on every call.
+"""
+
+# Ray directions as (dx, dy)
+NORTH, SOUTH, EAST, WEST, NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST = range(8)
+DIRECTION_STEPS = ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1))
+# Directions whose squares increase along the ray (nearest blocker is the lowest bit)
+POSITIVE_DIRECTIONS = (NORTH, EAST, NORTH_EAST, NORTH_WEST)
+ROOK_DIRECTIONS = (NORTH, SOUTH, EAST, WEST)
+BISHOP_DIRECTIONS = (NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+KNIGHT_STEPS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+KING_STEPS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def _targets(square, steps):
+    x, y = square & 7, square >> 3
+    return tuple((y + dy) * 8 + x + dx for dx, dy in steps
+                 if 0 <= x + dx <= 7 and 0 <= y + dy <= 7)
+
+
+def _ray(square, step):
+    # Squares from (excluding) square to the edge, nearest first
+    dx, dy = step
+    x, y = (square & 7) + dx, (square >> 3) + dy
+    ray = []
+    while 0 <= x <= 7 and 0 <= y <= 7:
+        ray.append(y * 8 + x)
+        x += dx
+        y += dy
+    return tuple(ray)
+
+
+def _mask(squares):
+    mask = 0
+    for square in squares:
+        mask |= 1 << square
+    return mask
+
+
+# (x, y) tuple for every square so generators don't build new ones
+SQUARE_POSITIONS = tuple((sq & 7, sq >> 3) for sq in range(64))
+
+KNIGHT_TARGETS = tuple(_targets(sq, KNIGHT_STEPS) for sq in range(64))
+KING_TARGETS = tuple(_targets(sq, KING_STEPS) for sq in range(64))
+KNIGHT_ATTACKS = tuple(_mask(targets) for targets in KNIGHT_TARGETS)
+KING_ATTACKS = tuple(_mask(targets) for targets in KING_TARGETS)
+
+# RAYS[direction][square] -> ordered squares, RAY_MASKS the same as bitboards
+RAYS = tuple(tuple(_ray(sq, step) for sq in range(64)) for step in DIRECTION_STEPS)
+RAY_MASKS = tuple(tuple(_mask(ray) for ray in rays) for rays in RAYS)
+
+# BETWEEN[a][b] -> squares strictly between two aligned squares, 0 otherwise
+BETWEEN = tuple(
+    tuple(next((_mask(ray[:ray.index(b)]) for ray in (RAYS[d][a] for d in range(8)) if b in ray), 0)
+          for b in range(64))
+    for a in range(64))
+
+# Squares a pawn of each color attacks from a square, indexed [color][square]
+PAWN_ATTACK_TARGETS = (
+    tuple(_targets(sq, ((-1, 1), (1, 1))) for sq in range(64)),
+    tuple(_targets(sq, ((-1, -1), (1, -1))) for sq in range(64)),
+)
+PAWN_ATTACKS = tuple(tuple(_mask(targets) for targets in per_color)
+                     for per_color in PAWN_ATTACK_TARGETS)
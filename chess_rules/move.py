@@ -0,0 +1,46 @@
+"""Move encoding.
+
+A move is a plain int: from square | to square << 6 | promotion type << 12.
+Castling is the king moving two files, en passant is a pawn moving to the
+en passant square; Position.make_move works both out from the board.
+"""
+from .movegen import generate_legal_moves
+from .position import FEN_PIECES, square_name, parse_square
+
+
+def encode_move(from_square, to_square, promotion=0):
+    # Moves are packed into one int: from | to << 6 | promotion type << 12
+    return from_square | to_square << 6 | promotion << 12
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return move >> 6 & 63
+
+
+def move_promotion(move):
+    # Promotion piece type, 0 (PAWN) when the move is not a promotion
+    return move >> 12
+
+
+def move_name(move):
+    # Coordinate notation, e.g. e2e4 or e7e8q
+    name = square_name(move & 63) + square_name(move >> 6 & 63)
+    if move >> 12:
+        name += FEN_PIECES[move >> 12]
+    return name
+
+
+def parse_move(pos, text):
+    """Legal move in pos matching coordinate notation like 'e2e4' or 'e7e8q'"""
+    text = text.strip().lower()
+    if len(text) not in (4, 5):
+        raise ValueError(f"Invalid move: {text}")
+    move = encode_move(parse_square(text[:2]), parse_square(text[2:4]),
+                       FEN_PIECES.index(text[4]) if len(text) == 5 else 0)
+    if move not in generate_legal_moves(pos):
+        raise ValueError(f"Illegal move in this position: {text}")
+    return move
@@ -0,0 +1,254 @@
+"""Legal move generation on a Position.
+
+Checkers and pinned pieces are worked out once per position, so every
+generated move is legal without playing it and testing for check.
+"""
+from .attack_tables import (KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, RAY_MASKS, BETWEEN,
+                           POSITIVE_DIRECTIONS, ROOK_DIRECTIONS, BISHOP_DIRECTIONS)
+from .position import (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE_INDEX, NO_SQUARE, FULL_BOARD,
+                       WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE, iter_bits)
+
+PROMOTION_TYPES = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# (ray masks per square, nearest blocker is the lowest bit) for each direction
+_ROOK_RAYS = tuple((RAY_MASKS[d], d in POSITIVE_DIRECTIONS) for d in ROOK_DIRECTIONS)
+_BISHOP_RAYS = tuple((RAY_MASKS[d], d in POSITIVE_DIRECTIONS) for d in BISHOP_DIRECTIONS)
+
+
+def _slider_attacks(square, occupied, rays):
+    attacks = 0
+    for masks, positive in rays:
+        ray = masks[square]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            # Keep the ray up to and including the first blocker
+            ray ^= masks[first]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    return _slider_attacks(square, occupied, _ROOK_RAYS)
+
+
+def bishop_attacks(square, occupied):
+    return _slider_attacks(square, occupied, _BISHOP_RAYS)
+
+
+def attackers_to(pos, square, by_color, occupied=None):
+    """Bitboard of by_color's pieces attacking square.
+
+    Looks outward from the target square with the knight/king/pawn tables
+    and sliding rays instead of generating the attackers' moves. A custom
+    occupancy can be passed to see through pieces (e.g. a moving king).
+    """
+    if occupied is None:
+        occupied = pos.occupied
+    pieces = pos.pieces[by_color]
+    attackers = (KNIGHT_ATTACKS[square] & pieces[KNIGHT]
+                 | KING_ATTACKS[square] & pieces[KING]
+                 | PAWN_ATTACKS[by_color ^ 1][square] & pieces[PAWN])
+    rooks = pieces[ROOK] | pieces[QUEEN]
+    if rooks:
+        attackers |= rook_attacks(square, occupied) & rooks
+    bishops = pieces[BISHOP] | pieces[QUEEN]
+    if bishops:
+        attackers |= bishop_attacks(square, occupied) & bishops
+    return attackers & occupied
+
+
+def is_square_attacked(pos, square, by_color, occupied=None):
+    # Early-exit version of attackers_to, cheapest pieces first
+    if occupied is None:
+        occupied = pos.occupied
+    pieces = pos.pieces[by_color]
+    if (PAWN_ATTACKS[by_color ^ 1][square] & pieces[PAWN]
+            or KNIGHT_ATTACKS[square] & pieces[KNIGHT]
+            or KING_ATTACKS[square] & pieces[KING]):
+        return True
+    rooks = pieces[ROOK] | pieces[QUEEN]
+    if rooks and rook_attacks(square, occupied) & rooks:
+        return True
+    bishops = pieces[BISHOP] | pieces[QUEEN]
+    return bool(bishops and bishop_attacks(square, occupied) & bishops)
+
+
+def is_in_check(pos, color):
+    king = pos.pieces[color][KING]
+    return bool(king) and is_square_attacked(pos, king.bit_length() - 1, color ^ 1)
+
+
+def attack_map(pos, color):
+    # Bitboard of every square attacked by color's pieces
+    pieces = pos.pieces[color]
+    occupied = pos.occupied
+    attacked = 0
+    for square in iter_bits(pieces[PAWN]):
+        attacked |= PAWN_ATTACKS[color][square]
+    for square in iter_bits(pieces[KNIGHT]):
+        attacked |= KNIGHT_ATTACKS[square]
+    for square in iter_bits(pieces[BISHOP] | pieces[QUEEN]):
+        attacked |= bishop_attacks(square, occupied)
+    for square in iter_bits(pieces[ROOK] | pieces[QUEEN]):
+        attacked |= rook_attacks(square, occupied)
+    for square in iter_bits(pieces[KING]):
+        attacked |= KING_ATTACKS[square]
+    return attacked
+
+
+def _pin_masks(pos, king, us):
+    # Squares each pinned piece may still move to (along the pin line)
+    pins = {}
+    own = pos.colors[us]
+    occupied = pos.occupied
+    theirs = pos.pieces[us ^ 1]
+    rooks = theirs[ROOK] | theirs[QUEEN]
+    bishops = theirs[BISHOP] | theirs[QUEEN]
+
+    for rays, sliders in ((_ROOK_RAYS, rooks), (_BISHOP_RAYS, bishops)):
+        if not sliders:
+            continue
+        for masks, positive in rays:
+            ray = masks[king]
+            if not ray & sliders:
+                continue
+            blockers = ray & occupied
+            # First two pieces along the ray: our piece, then their slider
+            if positive:
+                first = blockers & -blockers
+                rest = blockers ^ first
+                second = rest & -rest
+            else:
+                first = 1 << (blockers.bit_length() - 1)
+                rest = blockers ^ first
+                second = 1 << (rest.bit_length() - 1) if rest else 0
+            if first & own and second & sliders:
+                pinner = second.bit_length() - 1
+                pins[first.bit_length() - 1] = BETWEEN[king][pinner] | second
+    return pins
+
+
+def _add_pawn_move(moves, from_square, to_square):
+    if to_square >= 56 or to_square < 8:
+        for piece_type in PROMOTION_TYPES:
+            moves.append(from_square | to_square << 6 | piece_type << 12)
+    else:
+        moves.append(from_square | to_square << 6)
+
+
+def generate_legal_moves(pos):
+    """All legal moves for the side to move, as encoded ints."""
+    us = pos.side
+    them = us ^ 1
+    mine = pos.pieces[us]
+    own = pos.colors[us]
+    occupied = pos.occupied
+    moves = []
+
+    king_bb = mine[KING]
+    if not king_bb:
+        return moves
+    king = king_bb.bit_length() - 1
+
+    # King moves, with the king lifted off the board so sliders see through it
+    without_king = occupied ^ king_bb
+    for to_square in iter_bits(KING_ATTACKS[king] & ~own):
+        if not is_square_attacked(pos, to_square, them, without_king):
+            moves.append(king | to_square << 6)
+
+    checkers = attackers_to(pos, king, them, occupied)
+    if checkers & (checkers - 1):
+        # Double check, only the king can move
+        return moves
+
+    if checkers:
+        checker = checkers.bit_length() - 1
+        target_mask = checkers | BETWEEN[king][checker]
+    else:
+        target_mask = FULL_BOARD
+        _add_castling_moves(pos, moves, us, king)
+
+    pins = _pin_masks(pos, king, us)
+    movable = ~own & target_mask
+
+    # Pinned knights can never move
+    for from_square in iter_bits(mine[KNIGHT]):
+        if from_square not in pins:
+            for to_square in iter_bits(KNIGHT_ATTACKS[from_square] & movable):
+                moves.append(from_square | to_square << 6)
+
+    for from_square in iter_bits(mine[BISHOP] | mine[QUEEN]):
+        targets = bishop_attacks(from_square, occupied) & movable
+        if from_square in pins:
+            targets &= pins[from_square]
+        for to_square in iter_bits(targets):
+            moves.append(from_square | to_square << 6)
+
+    for from_square in iter_bits(mine[ROOK] | mine[QUEEN]):
+        targets = rook_attacks(from_square, occupied) & movable
+        if from_square in pins:
+            targets &= pins[from_square]
+        for to_square in iter_bits(targets):
+            moves.append(from_square | to_square << 6)
+
+    _add_pawn_moves(pos, moves, us, king, target_mask, pins)
+    return moves
+
+
+def _add_pawn_moves(pos, moves, us, king, target_mask, pins):
+    occupied = pos.occupied
+    enemy = pos.colors[us ^ 1]
+    attacks = PAWN_ATTACKS[us]
+    ep_square = pos.ep_square
+    if us == WHITE_INDEX:
+        step, start_rank = 8, 1
+    else:
+        step, start_rank = -8, 6
+
+    for from_square in iter_bits(pos.pieces[us][PAWN]):
+        mask = target_mask
+        if from_square in pins:
+            mask &= pins[from_square]
+
+        # Pushes
+        to_square = from_square + step
+        if 0 <= to_square < 64 and not occupied >> to_square & 1:
+            if mask >> to_square & 1:
+                _add_pawn_move(moves, from_square, to_square)
+            double = to_square + step
+            if from_square >> 3 == start_rank and not occupied >> double & 1 and mask >> double & 1:
+                moves.append(from_square | double << 6)
+
+        # Captures
+        for to_square in iter_bits(attacks[from_square] & enemy & mask):
+            _add_pawn_move(moves, from_square, to_square)
+
+        # En passant, checked by replaying the occupancy change on the king
+        if ep_square != NO_SQUARE and attacks[from_square] >> ep_square & 1:
+            captured = ep_square - step
+            after = occupied ^ (1 << from_square) ^ (1 << captured) | (1 << ep_square)
+            if not attackers_to(pos, king, us ^ 1, after) & ~(1 << captured):
+                moves.append(from_square | ep_square << 6)
+
+
+def _add_castling_moves(pos, moves, us, king):
+    # Only called when not in check
+    occupied = pos.occupied
+    them = us ^ 1
+    if us == WHITE_INDEX:
+        kingside, queenside, home = WHITE_KINGSIDE, WHITE_QUEENSIDE, 4
+    else:
+        kingside, queenside, home = BLACK_KINGSIDE, BLACK_QUEENSIDE, 60
+    if king != home:
+        return
+
+    if pos.castling & kingside and not occupied & (0b11 << (home + 1)):
+        if not is_square_attacked(pos, home + 1, them) and not is_square_attacked(pos, home + 2, them):
+            moves.append(home | (home + 2) << 6)
+    if pos.castling & queenside and not occupied & (0b111 << (home - 3)):
+        if not is_square_attacked(pos, home - 1, them) and not is_square_attacked(pos, home - 2, them):
+            moves.append(home | (home - 2) << 6)
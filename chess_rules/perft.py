@@ -0,0 +1,138 @@
+"""Perft: count the leaf nodes of the legal move tree to a fixed depth.
+
+Used both as a correctness check for move generation (the counts for the
+positions below are well known) and as a move generator speed benchmark.
+
+    python -m chess_rules.perft -d 4                         # start position to depth 4
+    python -m chess_rules.perft -d 3 --fen "<fen>" --divide  # node count per root move
+    python -m chess_rules.perft --suite -d 4                 # run the regression suite
+"""
+import argparse
+import sys
+import time
+
+from .movegen import generate_legal_moves
+from .move import move_name
+from .position import Position, START_FEN
+
+# (name, FEN, node counts for depth 1, 2, ...)
+PERFT_SUITE = [
+    ("Start position", START_FEN,
+     (20, 400, 8902, 197281)),
+    ("Kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     (48, 2039, 97862, 4085603)),
+    ("Rook endgame with en passant pins", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     (14, 191, 2812, 43238, 674624)),
+    ("Promotions and castling", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     (6, 264, 9467, 422333)),
+    ("Promotion with discovered check", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     (44, 1486, 62379, 2103487)),
+    ("Symmetrical middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     (46, 2079, 89890, 3894594)),
+    ("Illegal en passant (horizontal pin)", "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1",
+     (18, 92, 1670, 10138, 185429)),
+    ("Illegal en passant (diagonal pin)", "8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1",
+     (13, 102, 1266, 10276, 135655, 1015133)),
+    ("En passant capture gives check", "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1",
+     (15, 126, 1928, 13931, 206379)),
+    ("Short castling gives check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1",
+     (15, 66, 1198, 6399, 120330, 661072)),
+    ("Long castling gives check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1",
+     (16, 71, 1286, 7418, 141077, 803711)),
+    ("Castling rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1",
+     (26, 1141, 27826, 1274206)),
+    ("Castling prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1",
+     (44, 1494, 50509, 1720476)),
+    ("Promote out of check", "2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1",
+     (11, 133, 1442, 19174, 266199)),
+    ("Discovered check", "8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1",
+     (29, 165, 5160, 31961, 1004658)),
+    ("Promote to give check", "4k3/1P6/8/8/8/8/K7/8 w - - 0 1",
+     (9, 40, 472, 2661, 38983, 217342)),
+    ("Underpromote to give check", "8/P1k5/K7/8/8/8/8/8 w - - 0 1",
+     (6, 27, 273, 1329, 18135, 92683)),
+    ("Self stalemate", "K1k5/8/P7/8/8/8/8/8 w - - 0 1",
+     (2, 6, 13, 63, 382, 2217)),
+    ("Stalemate and checkmate", "8/k1P5/8/1K6/8/8/8/8 w - - 0 1",
+     (10, 25, 268, 926, 10857, 43261)),
+    ("Stalemate and checkmate (black)", "8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1",
+     (37, 183, 6559, 23527, 811573)),
+]
+
+
+def perft(pos, depth):
+    """Number of leaf nodes depth plies below pos"""
+    moves = generate_legal_moves(pos)
+    if depth <= 1:
+        # Bulk count: the last ply needs no make/unmake
+        return len(moves) if depth == 1 else 1
+
+    nodes = 0
+    for move in moves:
+        pos.make_move(move)
+        nodes += perft(pos, depth - 1)
+        pos.unmake_move()
+    return nodes
+
+
+def divide(pos, depth):
+    """Perft split by root move, as {move name: nodes}"""
+    counts = {}
+    for move in generate_legal_moves(pos):
+        pos.make_move(move)
+        counts[move_name(move)] = perft(pos, depth - 1)
+        pos.unmake_move()
+    return counts
+
+
+def run_suite(max_depth, out=sys.stdout):
+    """Check every suite position up to max_depth, returns True if all match"""
+    all_passed = True
+    total_nodes = 0
+    start = time.perf_counter()
+
+    for name, fen, expected in PERFT_SUITE:
+        depth = min(max_depth, len(expected))
+        pos = Position.from_fen(fen)
+        nodes = perft(pos, depth)
+        total_nodes += nodes
+        passed = nodes == expected[depth - 1]
+        all_passed = all_passed and passed
+        status = "ok" if passed else f"FAIL (expected {expected[depth - 1]})"
+        print(f"{name:<40} depth {depth}  {nodes:>9}  {status}", file=out)
+
+    elapsed = time.perf_counter() - start
+    print(f"{total_nodes} nodes in {elapsed:.2f}s ({total_nodes / max(elapsed, 1e-9):,.0f} nodes/s)", file=out)
+    return all_passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft move generator test and benchmark")
+    parser.add_argument('-d', '--depth', type=int, default=4, help="search depth in plies")
+    parser.add_argument('--fen', default=START_FEN, help="position to search (default: start position)")
+    parser.add_argument('--divide', action='store_true', help="print node counts per root move")
+    parser.add_argument('--suite', action='store_true', help="run the built-in regression suite")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        return 0 if run_suite(args.depth) else 1
+
+    pos = Position.from_fen(args.fen)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(pos, args.depth)
+        for name in sorted(counts):
+            print(f"{name}: {counts[name]}")
+        nodes = sum(counts.values())
+        print(f"\nMoves: {len(counts)}")
+    else:
+        nodes = perft(pos, args.depth)
+    elapsed = time.perf_counter() - start
+
+    print(f"Nodes: {nodes}")
+    print(f"Time: {elapsed:.3f}s ({nodes / max(elapsed, 1e-9):,.0f} nodes/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""Board state: bitboards, side to move, castling, en passant, clocks and hash."""
+import struct
+
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_FILE_KEYS
+from .psqt import MG_TABLE, EG_TABLE, PHASE_TABLE
+
+# Piece type indices used by the bitboards
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+TYPE_NAMES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+TYPE_INDEX = {name: i for i, name in enumerate(TYPE_NAMES)}
+
+# Color indices, names match the WHITE/BLACK constants used by the UI
+WHITE_INDEX, BLACK_INDEX = 0, 1
+COLOR_NAMES = ('white', 'black')
+COLOR_INDEX = {name: i for i, name in enumerate(COLOR_NAMES)}
+
+EMPTY = -1  # Mailbox value for an empty square
+NO_SQUARE = -1  # En passant square when there is none
+FULL_BOARD = (1 << 64) - 1
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+FEN_PIECES = 'pnbrqk'
+
+# Castling right bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = 15
+
+# Snapshot state after the packed board: side, castling, en passant, halfmove, fullmove
+_STATE = struct.Struct('<BBBHH')
+
+# Rights that survive a move touching each square (king and rook home squares)
+CASTLING_MASK = [ALL_CASTLING] * 64
+CASTLING_MASK[4] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[0] &= ~WHITE_QUEENSIDE
+CASTLING_MASK[7] &= ~WHITE_KINGSIDE
+CASTLING_MASK[60] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[56] &= ~BLACK_QUEENSIDE
+CASTLING_MASK[63] &= ~BLACK_KINGSIDE
+
+
+def square_index(position):
+    # (x, y) board coordinates -> 0..63, a1 = 0, h8 = 63
+    x, y = position
+    return y * 8 + x
+
+
+def square_position(square):
+    # 0..63 -> (x, y) board coordinates
+    return square & 7, square >> 3
+
+
+def on_board(position):
+    x, y = position
+    return 0 <= x <= 7 and 0 <= y <= 7
+
+
+def iter_bits(bb):
+    # Yield the square of every set bit, lowest first
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def lsb(bb):
+    # Square of the lowest set bit
+    return (bb & -bb).bit_length() - 1
+
+
+def popcount(bb):
+    return bin(bb).count('1')
+
+
+def square_name(square):
+    return 'abcdefgh'[square & 7] + str((square >> 3) + 1)
+
+
+def parse_square(name):
+    return (int(name[1]) - 1) * 8 + 'abcdefgh'.index(name[0])
+
+
+class Position:
+    """Bitboard representation of the pieces on the board.
+
+    Every piece type of every color has its own 64-bit integer where bit n is
+    set when such a piece stands on square n. A mailbox of piece codes
+    (color * 6 + type) gives O(1) lookup of what stands on a square.
+
+    The Zobrist hash is updated incrementally by every change, and so are the
+    evaluation terms: mg and eg are the material + piece-square totals from
+    White's side and phase is the sum of the phase weights of the pieces.
+    """
+
+    __slots__ = ('pieces', 'colors', 'occupied', 'squares', 'side', 'castling', 'ep_square',
+                 'halfmove_clock', 'fullmove_number', 'history', 'hash', 'mg', 'eg', 'phase')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.pieces = [[0] * 6, [0] * 6]  # [color][piece type]
+        self.colors = [0, 0]  # occupancy per color
+        self.occupied = 0
+        self.squares = [EMPTY] * 64
+        self.side = WHITE_INDEX  # color to move
+        self.castling = 0
+        self.ep_square = NO_SQUARE
+        self.halfmove_clock = 0  # plies since the last capture or pawn move
+        self.fullmove_number = 1
+        self.history = []  # undo records for unmake_move
+        self.hash = CASTLING_KEYS[0]
+        self.mg = self.eg = self.phase = 0
+
+    @classmethod
+    def from_fen(cls, fen=START_FEN):
+        """Build a position from a FEN string"""
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN: {fen}")
+        pos = cls()
+
+        rows = fields[0].split('/')
+        if len(rows) != 8:
+            raise ValueError(f"Invalid FEN board: {fields[0]}")
+        for row_index, row in enumerate(rows):
+            y = 7 - row_index
+            x = 0
+            for char in row:
+                if char.isdigit():
+                    x += int(char)
+                    continue
+                if char.lower() not in FEN_PIECES or x > 7:
+                    raise ValueError(f"Invalid FEN board: {fields[0]}")
+                color = WHITE_INDEX if char.isupper() else BLACK_INDEX
+                pos.add_piece(color, FEN_PIECES.index(char.lower()), y * 8 + x)
+                x += 1
+
+        castling = 0
+        for char, right in zip('KQkq', (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            if char in fields[2]:
+                castling |= right
+        ep_square = NO_SQUARE if fields[3] == '-' else parse_square(fields[3])
+        pos.set_state(WHITE_INDEX if fields[1] == 'w' else BLACK_INDEX, castling, ep_square)
+        if len(fields) >= 6:
+            pos.halfmove_clock = int(fields[4])
+            pos.fullmove_number = int(fields[5])
+        return pos
+
+    def to_fen(self):
+        rows = []
+        for y in range(7, -1, -1):
+            row = ''
+            empty = 0
+            for x in range(8):
+                code = self.squares[y * 8 + x]
+                if code == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                char = FEN_PIECES[code % 6]
+                row += char.upper() if code < 6 else char
+            if empty:
+                row += str(empty)
+            rows.append(row)
+
+        castling = ''.join(char for char, right in zip('KQkq', (WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                                                                   BLACK_KINGSIDE, BLACK_QUEENSIDE))
+                           if self.castling & right) or '-'
+        ep = '-' if self.ep_square == NO_SQUARE else square_name(self.ep_square)
+        side = 'w' if self.side == WHITE_INDEX else 'b'
+        return f"{'/'.join(rows)} {side} {castling} {ep} {self.halfmove_clock} {self.fullmove_number}"
+
+    def copy(self):
+        # Independent position with the same board and state, without move history
+        pos = Position.__new__(Position)
+        pos.pieces = [self.pieces[0][:], self.pieces[1][:]]
+        pos.colors = self.colors[:]
+        pos.occupied = self.occupied
+        pos.squares = self.squares[:]
+        pos.side = self.side
+        pos.castling = self.castling
+        pos.ep_square = self.ep_square
+        pos.halfmove_clock = self.halfmove_clock
+        pos.fullmove_number = self.fullmove_number
+        pos.history = []
+        pos.hash = self.hash
+        pos.mg = self.mg
+        pos.eg = self.eg
+        pos.phase = self.phase
+        return pos
+
+    def to_bytes(self):
+        """Compact snapshot: a nibble per square plus a 7-byte state record (39 bytes)"""
+        board = bytearray(32)
+        for square, code in enumerate(self.squares):
+            if code != EMPTY:
+                board[square >> 1] |= (code + 1) << ((square & 1) * 4)
+        ep = 0xFF if self.ep_square == NO_SQUARE else self.ep_square
+        return bytes(board) + _STATE.pack(self.side, self.castling, ep,
+                                          min(self.halfmove_clock, 0xFFFF), min(self.fullmove_number, 0xFFFF))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Position from a to_bytes snapshot, without move history"""
+        if len(data) != 32 + _STATE.size:
+            raise ValueError(f"Invalid position snapshot of {len(data)} bytes")
+        pos = cls()
+        for square in range(64):
+            code = (data[square >> 1] >> ((square & 1) * 4) & 15) - 1
+            if code != EMPTY:
+                pos.add_piece(code // 6, code % 6, square)
+        side, castling, ep, pos.halfmove_clock, pos.fullmove_number = _STATE.unpack_from(data, 32)
+        pos.set_state(side, castling, NO_SQUARE if ep == 0xFF else ep)
+        return pos
+
+    def set_state(self, side, castling, ep_square=NO_SQUARE):
+        # Set side to move, castling rights and en passant square, e.g. after setup
+        self.side = side
+        self.castling = castling
+        self.ep_square = ep_square
+        self.hash = self.compute_hash()
+
+    def compute_hash(self):
+        # Full Zobrist hash from scratch, make_move keeps it up to date incrementally
+        h = CASTLING_KEYS[self.castling]
+        for square, code in enumerate(self.squares):
+            if code != EMPTY:
+                h ^= PIECE_KEYS[code][square]
+        if self.side == BLACK_INDEX:
+            h ^= SIDE_KEY
+        if self.ep_square != NO_SQUARE:
+            h ^= EP_FILE_KEYS[self.ep_square & 7]
+        return h
+
+    def compute_scores(self):
+        # (mg, eg, phase) from scratch, add/remove/move_piece keep them up to date
+        mg = eg = phase = 0
+        for square, code in enumerate(self.squares):
+            if code != EMPTY:
+                mg += MG_TABLE[code][square]
+                eg += EG_TABLE[code][square]
+                phase += PHASE_TABLE[code]
+        return mg, eg, phase
+
+    def add_piece(self, color, piece_type, square):
+        bit = 1 << square
+        self.pieces[color][piece_type] |= bit
+        self.colors[color] |= bit
+        self.occupied |= bit
+        code = color * 6 + piece_type
+        self.squares[square] = code
+        self.hash ^= PIECE_KEYS[code][square]
+        self.mg += MG_TABLE[code][square]
+        self.eg += EG_TABLE[code][square]
+        self.phase += PHASE_TABLE[code]
+
+    def remove_piece(self, square):
+        code = self.squares[square]
+        color, piece_type = divmod(code, 6)
+        mask = ~(1 << square)
+        self.pieces[color][piece_type] &= mask
+        self.colors[color] &= mask
+        self.occupied &= mask
+        self.squares[square] = EMPTY
+        self.hash ^= PIECE_KEYS[code][square]
+        self.mg -= MG_TABLE[code][square]
+        self.eg -= EG_TABLE[code][square]
+        self.phase -= PHASE_TABLE[code]
+        return color, piece_type
+
+    def move_piece(self, from_square, to_square):
+        code = self.squares[from_square]
+        color, piece_type = divmod(code, 6)
+        move_mask = (1 << from_square) | (1 << to_square)
+        self.pieces[color][piece_type] ^= move_mask
+        self.colors[color] ^= move_mask
+        self.occupied ^= move_mask
+        self.squares[from_square] = EMPTY
+        self.squares[to_square] = code
+        keys = PIECE_KEYS[code]
+        self.hash ^= keys[from_square] ^ keys[to_square]
+        table = MG_TABLE[code]
+        self.mg += table[to_square] - table[from_square]
+        table = EG_TABLE[code]
+        self.eg += table[to_square] - table[from_square]
+
+    def piece_at(self, square):
+        # (color, piece type) on a square, or None
+        code = self.squares[square]
+        if code == EMPTY:
+            return None
+        return divmod(code, 6)
+
+    def is_occupied(self, square):
+        return self.occupied >> square & 1 == 1
+
+    def king_square(self, color):
+        king = self.pieces[color][KING]
+        return lsb(king) if king else None
+
+    def make_move(self, move):
+        """Play a move and push an undo record.
+
+        Handles captures, en passant, castling (king moving two files) and
+        promotions. Returns the captured piece code, or EMPTY.
+        """
+        from_square = move & 63
+        to_square = move >> 6 & 63
+        promotion = move >> 12
+        squares = self.squares
+        code = squares[from_square]
+        color, piece_type = divmod(code, 6)
+
+        captured = squares[to_square]
+        captured_square = to_square
+        if piece_type == PAWN and to_square == self.ep_square and captured == EMPTY:
+            captured_square = to_square - 8 if color == WHITE_INDEX else to_square + 8
+            captured = squares[captured_square]
+
+        self.history.append((move, captured, captured_square, self.ep_square, self.castling, self.hash,
+                             self.halfmove_clock))
+
+        if captured != EMPTY:
+            self.remove_piece(captured_square)
+        self.move_piece(from_square, to_square)
+
+        if promotion:
+            self.remove_piece(to_square)
+            self.add_piece(color, promotion, to_square)
+        elif piece_type == KING and abs(to_square - from_square) == 2:
+            # Castling also moves the rook next to the king
+            if to_square > from_square:
+                self.move_piece(from_square + 3, from_square + 1)
+            else:
+                self.move_piece(from_square - 4, from_square - 1)
+
+        h = self.hash ^ SIDE_KEY ^ CASTLING_KEYS[self.castling]
+        if self.ep_square != NO_SQUARE:
+            h ^= EP_FILE_KEYS[self.ep_square & 7]
+        if piece_type == PAWN and abs(to_square - from_square) == 16:
+            self.ep_square = (from_square + to_square) >> 1
+            h ^= EP_FILE_KEYS[from_square & 7]
+        else:
+            self.ep_square = NO_SQUARE
+
+        self.castling &= CASTLING_MASK[from_square] & CASTLING_MASK[to_square]
+        self.hash = h ^ CASTLING_KEYS[self.castling]
+        if piece_type == PAWN or captured != EMPTY:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if color == BLACK_INDEX:
+            self.fullmove_number += 1
+        self.side ^= 1
+        return captured
+
+    def unmake_move(self):
+        # Take back the last move made with make_move
+        (move, captured, captured_square, self.ep_square, self.castling, old_hash,
+         self.halfmove_clock) = self.history.pop()
+        from_square = move & 63
+        to_square = move >> 6 & 63
+        self.side ^= 1
+        if self.side == BLACK_INDEX:
+            self.fullmove_number -= 1
+
+        if move >> 12:
+            # Promoted piece turns back into a pawn
+            color = self.remove_piece(to_square)[0]
+            self.add_piece(color, PAWN, to_square)
+        elif self.squares[to_square] % 6 == KING and abs(to_square - from_square) == 2:
+            if to_square > from_square:
+                self.move_piece(from_square + 1, from_square + 3)
+            else:
+                self.move_piece(from_square - 1, from_square - 4)
+
+        self.move_piece(to_square, from_square)
+        if captured != EMPTY:
+            self.add_piece(captured // 6, captured % 6, captured_square)
+        self.hash = old_hash
+
+    def repetition_count(self):
+        # How many times the current position has occurred, counting this one
+        count = 1
+        history = self.history
+        # Only positions since the last irreversible move, same side to move
+        for back in range(2, min(self.halfmove_clock, len(history)) + 1, 2):
+            if history[-back][5] == self.hash:
+                count += 1
+        return count
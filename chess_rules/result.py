@@ -0,0 +1,48 @@
+"""Game result detection: checkmate, stalemate and the draw rules."""
+from .movegen import generate_legal_moves, is_in_check
+from .position import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, COLOR_NAMES, popcount
+
+DRAW = 'draw'
+
+CHECKMATE = 'checkmate'
+STALEMATE = 'stalemate'
+INSUFFICIENT_MATERIAL = 'insufficient material'
+FIFTY_MOVE_RULE = 'fifty-move rule'
+THREEFOLD_REPETITION = 'threefold repetition'
+
+DARK_SQUARES = sum(1 << sq for sq in range(64) if ((sq & 7) + (sq >> 3)) % 2 == 0)
+
+
+def has_insufficient_material(pos):
+    # Neither side can ever mate: bare kings, one minor piece, or same-colored bishops
+    white, black = pos.pieces
+    if white[PAWN] | black[PAWN] | white[ROOK] | black[ROOK] | white[QUEEN] | black[QUEEN]:
+        return False
+    knights = white[KNIGHT] | black[KNIGHT]
+    bishops = white[BISHOP] | black[BISHOP]
+    if popcount(knights | bishops) <= 1:
+        return True
+    return not knights and (not bishops & DARK_SQUARES or bishops & DARK_SQUARES == bishops)
+
+
+def game_result(pos, legal_moves=None):
+    """How the game stands in pos.
+
+    Returns None while the game goes on, otherwise (winner, reason) where
+    winner is 'white', 'black' or 'draw'. Pass legal_moves if they are
+    already generated for pos.
+    """
+    if legal_moves is None:
+        legal_moves = generate_legal_moves(pos)
+
+    if not legal_moves:
+        if is_in_check(pos, pos.side):
+            return COLOR_NAMES[pos.side ^ 1], CHECKMATE
+        return DRAW, STALEMATE
+    if has_insufficient_material(pos):
+        return DRAW, INSUFFICIENT_MATERIAL
+    if pos.halfmove_clock >= 100:
+        return DRAW, FIFTY_MOVE_RULE
+    if pos.repetition_count() >= 3:
+        return DRAW, THREEFOLD_REPETITION
+    return None
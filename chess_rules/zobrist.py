@@ -0,0 +1,20 @@
+"""Zobrist keys for hashing positions.
+
+A position's hash is the XOR of one random 64-bit key per (piece, square),
+plus keys for the side to move, the castling rights and the en passant
+file. Keys come from a fixed seed so hashes are stable between runs.
+"""
+import random
+
+_rng = random.Random(0x5EED_C0DE)
+
+# PIECE_KEYS[piece code][square], piece code = color * 6 + piece type
+PIECE_KEYS = tuple(tuple(_rng.getrandbits(64) for _ in range(64)) for _ in range(12))
+# XORed in when black is to move
+SIDE_KEY = _rng.getrandbits(64)
+# One key per castling rights combination (4 bits)
+CASTLING_KEYS = tuple(_rng.getrandbits(64) for _ in range(16))
+# One key per en passant file
+EP_FILE_KEYS = tuple(_rng.getrandbits(64) for _ in range(8))
+
+del _rng
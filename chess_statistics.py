@@ -143,6 +143,10 @@ class ChessStatistics:
             'move_number': self.game_data['total_moves']
         })
 
+    def record_opening(self, name):
+        """Record the name of the opening played"""
+        self.game_data['opening'] = name
+
     def record_check(self):
         """Record when check occurs"""
         self.game_data['check_events'] += 1
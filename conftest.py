@@ -0,0 +1 @@
+# Lets pytest import the top-level packages when started from any directory
@@ -50,4 +50,9 @@ CLASSICAL = 3  # 30 min
 
 # Time in seconds
 TIME_CONTROLS = [60, 180, 600, 1800]  # 1, 3, 10, 30 minutes
-TIME_NAMES = ["Bullet", "Blitz", "Rapid", "Classical"]
\ No newline at end of file
+TIME_NAMES = ["Bullet", "Blitz", "Rapid", "Classical"]
+# Computer opponent
+ENGINE_HASH_MB = 16  # transposition table size cap in megabytes
+ENGINE_THREADS = 1  # search processes sharing the table, raise on multi-core machines
+BOOK_PATH = "books/openings.bin"  # Polyglot opening book, not shipped; the engine searches every move without it
+BOOK_MAX_PLY = 16  # stop playing book moves after this many plies
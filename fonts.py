@@ -0,0 +1,48 @@
+"""Process-wide cache of fonts and rendered text.
+
+Each font is loaded once per size and shared by every screen. Rendered
+text surfaces are kept in a size-bounded LRU cache keyed by (font, text,
+color), so labels that stay the same from frame to frame are rasterized
+once and then only blitted.
+"""
+from collections import OrderedDict
+
+import pygame
+
+FONT_FILE = 'freesansbold.ttf'
+FALLBACK_FONT = 'Arial'
+TEXT_CACHE_SIZE = 512  # rendered strings kept, the least recently used go first
+
+_fonts = {}  # size -> Font
+_text_cache = OrderedDict()  # (font, text, color) -> rendered surface
+
+
+def get_font(size):
+    """Shared font of the given size, the system font if the bundled one is missing"""
+    font = _fonts.get(size)
+    if font is None:
+        try:
+            font = pygame.font.Font(FONT_FILE, size)
+        except (FileNotFoundError, OSError):
+            font = pygame.font.SysFont(FALLBACK_FONT, size)
+        _fonts[size] = font
+    return font
+
+
+def render_text(font, text, color):
+    """Antialiased text surface, shared between callers; do not modify it."""
+    key = (font, text, color)
+    surface = _text_cache.get(key)
+    if surface is None:
+        surface = font.render(text, True, color)
+        _text_cache[key] = surface
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    else:
+        _text_cache.move_to_end(key)
+    return surface
+
+
+def clear_text_cache():
+    # Drop rendered text, e.g. after the display mode changes
+    _text_cache.clear()
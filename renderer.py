@@ -0,0 +1,58 @@
+"""Dirty-rectangle presentation for screens that rarely change.
+
+Each frame the screen is described as named regions, every one a rect and a
+hashable key of what is drawn there. The frame is only drawn when a key
+changed, and then only the rects of the changed regions are pushed to the
+display with pygame.display.update, so a screen where nothing happens costs
+neither drawing nor display traffic.
+"""
+import pygame
+
+
+class DirtyRectRenderer:
+    def __init__(self):
+        self._regions = {}  # name -> (rect, key) as last presented
+        self._full = True
+
+    def invalidate(self):
+        # Push the whole screen next frame, e.g. after another screen was shown
+        self._full = True
+
+    def changed_rects(self, regions):
+        """Rects that differ between the last presented regions and these"""
+        previous = self._regions
+        dirty = []
+        for name, (rect, key) in regions.items():
+            old = previous.get(name)
+            if old is None:
+                dirty.append(rect)
+            elif old[1] != key or old[0] != rect:
+                # a moved region also clears where it used to be
+                dirty.append(old[0])
+                if old[0] != rect:
+                    dirty.append(rect)
+        for name in previous.keys() - regions.keys():
+            dirty.append(previous[name][0])
+        return dirty
+
+    def present(self, regions, draw):
+        """Draw the frame with draw() and push it if any region changed.
+
+        regions maps a name to (rect, key). Returns the rects pushed, empty
+        when the frame was skipped.
+        """
+        if self._full:
+            dirty = [pygame.display.get_surface().get_rect()]
+        else:
+            dirty = self.changed_rects(regions)
+        self._regions = regions
+        if not dirty:
+            return dirty
+
+        draw()
+        if self._full:
+            pygame.display.flip()
+            self._full = False
+        else:
+            pygame.display.update(dirty)
+        return dirty
@@ -0,0 +1,31 @@
+"""Frame pacing for the main loop.
+
+Frames run at the full rate only while something animates. Otherwise the
+loop sleeps in pygame.event.wait until input arrives or the next moment the
+screen changes by itself, such as a clock reaching its next second, so an
+idle window costs next to no CPU.
+"""
+import pygame
+
+
+class FrameScheduler:
+    def __init__(self, fps):
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self._settle = True  # draw the next frame without waiting, e.g. the first one
+
+    def wait(self, timeout=None):
+        """Wait for the next frame and return the input events for it.
+
+        timeout is the milliseconds until the screen changes without input:
+        0 while an animation runs, None when only input can change it.
+        """
+        self.clock.tick(self.fps)
+        events = pygame.event.get()
+        if not events and not self._settle and timeout != 0:
+            event = pygame.event.wait() if timeout is None else pygame.event.wait(timeout)
+            if event.type != pygame.NOEVENT:
+                events = [event] + pygame.event.get()
+        # screens draw before handling input, so show its effect on one more frame
+        self._settle = bool(events)
+        return events
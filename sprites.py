@@ -0,0 +1,91 @@
+"""Process-wide cache of piece sprites.
+
+Each PNG in images/ is decoded once and each (color, type, size) sprite is
+scaled once, then shared by every piece, promotion menu and captured list.
+"""
+import pygame
+from constants import *
+from fonts import get_font
+
+BOARD_PIECE_SIZE = 70
+BOARD_PAWN_SIZE = 65
+CAPTURED_PIECE_SIZE = 40
+
+_source_images = {}  # (color, piece_type) -> decoded PNG
+_sprites = {}  # (color, piece_type, size) -> scaled surface
+_faded_sprites = {}  # (color, piece_type, size, alpha) -> see-through copy
+
+
+def board_size_for(piece_type):
+    # Pawns are drawn a little smaller than the other pieces
+    return BOARD_PAWN_SIZE if piece_type == 'pawn' else BOARD_PIECE_SIZE
+
+
+def _prepare(surface):
+    # convert_alpha needs a display mode, so skip it before the window exists
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha()
+
+
+def _source_image(color, piece_type):
+    key = (color, piece_type)
+    image = _source_images.get(key)
+    if image is None:
+        try:
+            image = pygame.image.load(f"images/{color} {piece_type}.png")
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Error loading image: {e}")
+            # Create placeholder if image fails to load
+            image = create_placeholder_image(color, piece_type)
+        _source_images[key] = image
+    return image
+
+
+def piece_sprite(color, piece_type, size):
+    """Shared sprite for a piece, scaled to size x size; do not modify it."""
+    key = (color, piece_type, size)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        sprite = _prepare(pygame.transform.scale(_source_image(color, piece_type), (size, size)))
+        _sprites[key] = sprite
+    return sprite
+
+
+def faded_piece_sprite(color, piece_type, size, alpha):
+    # See-through copy for backgrounds, kept apart so the shared sprite is untouched
+    key = (color, piece_type, size, alpha)
+    sprite = _faded_sprites.get(key)
+    if sprite is None:
+        sprite = piece_sprite(color, piece_type, size).copy()
+        sprite.set_alpha(alpha)
+        _faded_sprites[key] = sprite
+    return sprite
+
+
+def clear_sprite_cache():
+    # Drop converted sprites, e.g. after the display mode changes
+    _sprites.clear()
+    _faded_sprites.clear()
+
+
+def create_placeholder_image(color, piece_type):
+    # Create simple colored rectangle as placeholder
+    size = BOARD_PIECE_SIZE
+    surface = pygame.Surface((size, size), pygame.SRCALPHA)
+
+    # Fill with color
+    bg_color = CREAM_WHITE if color == WHITE else (50, 50, 50)
+    pygame.draw.rect(surface, bg_color, (0, 0, size, size))
+
+    # Draw piece type text
+    font = get_font(20)
+    text = font.render(piece_type[0].upper(), True,
+                       (50, 50, 50) if color == WHITE else CREAM_WHITE)
+    text_rect = text.get_rect(center=(size // 2, size // 2))
+    surface.blit(text, text_rect)
+
+    # Draw border
+    pygame.draw.rect(surface, GOLD, (0, 0, size, size), 2)
+
+    return surface
@@ -0,0 +1,16 @@
+import io
+import os
+
+import pytest
+
+from chess_engine.bench import BENCH_POSITIONS, run
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="workers sharing one core search no more nodes than one")
+def test_smp_counts_every_worker():
+    # Each worker searches for the same time, so with the helpers' nodes
+    # counted two workers can never report fewer nodes than one
+    fens = BENCH_POSITIONS[:2]
+    single_nodes, _ = run(1, fens, 0.5, 16, out=io.StringIO())
+    smp_nodes, _ = run(2, fens, 0.5, 16, out=io.StringIO())
+    assert smp_nodes >= single_nodes
@@ -0,0 +1,23 @@
+import pytest
+
+from chess_engine.bitbase import DRAW, LOSS, WIN, probe
+from chess_rules.position import Position
+
+
+@pytest.mark.parametrize('fen, expected', [
+    ('8/8/8/8/8/8/1Q6/K6k w - - 0 1', WIN),
+    ('8/8/8/8/8/8/1Q6/K6k b - - 0 1', LOSS),
+    ('8/8/8/8/8/8/1q6/k6K b - - 0 1', WIN),  # stronger side Black, mirrored
+    ('8/8/8/8/8/8/K5Rk/8 b - - 0 1', DRAW),  # the lone king takes the rook
+    ('8/8/8/8/8/8/K5R1/7k w - - 0 1', WIN),
+    ('4k3/8/4K3/4P3/8/8/8/8 w - - 0 1', WIN),
+    ('4k3/8/4K3/4P3/8/8/8/8 b - - 0 1', LOSS),
+    ('8/8/8/8/8/3k4/3P4/3K4 w - - 0 1', DRAW),  # king in front of the pawn
+    ('7k/8/8/8/8/8/P7/K7 w - - 0 1', WIN),
+])
+def test_probe_known_results(fen, expected):
+    assert probe(Position.from_fen(fen)) == expected
+
+
+def test_probe_other_material():
+    assert probe(Position.from_fen('4k3/8/8/8/8/8/8/2B1K3 w - - 0 1')) is None
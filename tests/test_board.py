@@ -0,0 +1,38 @@
+import random
+
+import pygame
+
+from chess_board import ChessBoard
+from chess_rules.position import Position
+
+
+def _state(board):
+    return ([(p.piece_type, p.position, p.has_moved) for p in board.white_pieces],
+            [(p.piece_type, p.position, p.has_moved) for p in board.black_pieces], board.pos.hash)
+
+
+def _check_slots(board):
+    for pieces in (board.white_pieces, board.black_pieces):
+        for index, piece in enumerate(pieces):
+            assert piece.list_index == index
+            assert board.piece_squares[piece.position[1] * 8 + piece.position[0]] is piece
+
+
+def test_unmake_restores_piece_lists():
+    # Captures, promotions, castling and en passant, each undone on the spot
+    pygame.font.init()
+    board = ChessBoard(None)
+    board.load_position(Position.from_fen('r3k2r/1P4P1/8/3pP3/8/8/1p4p1/R3K2R w KQkq d6 0 1'))
+    rng = random.Random(0)
+    for _ in range(60):
+        moves = board.get_legal_moves()
+        if not moves:
+            break
+        before = _state(board)
+        for move in moves:
+            board.make_move(move)
+            _check_slots(board)
+            board.unmake_move()
+            assert _state(board) == before
+        _check_slots(board)
+        board.make_move(rng.choice(moves))